@@ -0,0 +1,33 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from reviews.models import (Category, Genre, Genre_title, RankingState,
+                            Review, Title)
+
+from .v1.cache import invalidate
+
+# Модель: ресурсы API, ответы которых зависят от её строк.
+CACHE_DEPENDENCIES = {
+    Category: ('categories', 'titles', 'facets'),
+    Genre: ('genres', 'titles', 'facets'),
+    Title: ('titles', 'facets'),
+    Genre_title: ('titles', 'facets'),
+    Review: ('titles',),
+    # Рейтинги меняются только при пересчёте, он сохраняет RankingState.
+    # Пересчёт идёт в отдельном процессе: сброс доходит до веб-процессов
+    # только через общий кэш.
+    RankingState: ('rankings',),
+}
+
+
+def invalidate_cache(sender, **kwargs):
+    invalidate(*CACHE_DEPENDENCIES[sender])
+
+
+def invalidate_title_genres(sender, action, **kwargs):
+    if action.startswith('post_'):
+        invalidate(*CACHE_DEPENDENCIES[Genre_title])
+
+
+for model in CACHE_DEPENDENCIES:
+    post_save.connect(invalidate_cache, sender=model)
+    post_delete.connect(invalidate_cache, sender=model)
+m2m_changed.connect(invalidate_title_genres, sender=Title.genre.through)
@@ -2,7 +2,8 @@ from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
 from .v1.views import (CategoryViewSet, CommentViewSet, GenreViewSet,
-                       ReviewViewSet, TitleViewSet, UserViewSet, signup, token)
+                       RankingViewSet, ReviewViewSet, TitleViewSet,
+                       UserViewSet, cache_stats, search, signup, token)
 
 v1_router = DefaultRouter()
 v1_router.register('titles', TitleViewSet, basename='title')
@@ -14,6 +15,8 @@ v1_router.register(
 v1_router.register('categories', CategoryViewSet)
 v1_router.register('genres', GenreViewSet)
 v1_router.register('users', UserViewSet)
+v1_router.register(r'rankings/(?P<kind>top|reviewed|trending)',
+                   RankingViewSet, basename='ranking')
 
 auth_patterns = [
     path('auth/token/', token, name='token'),
@@ -21,6 +24,8 @@ auth_patterns = [
 ]
 
 urlpatterns = [
+    path('v1/cache/stats/', cache_stats, name='cache-stats'),
+    path('v1/search/', search, name='search'),
     path('v1/', include(v1_router.urls)),
     path('v1/', include(auth_patterns))
 ]
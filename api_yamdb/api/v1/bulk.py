@@ -0,0 +1,244 @@
+from api.signals import CACHE_DEPENDENCIES
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.validators import UniqueValidator
+
+from .cache import invalidate
+
+BULK_MAX_ITEMS = 1000
+
+
+def bulk_create_with_pks(model, objs):
+    """
+    bulk_create, после которого у объектов заполнен pk. SQLite в
+    Django 2.2 не возвращает id вставленных строк; вызов идёт внутри
+    транзакции, которая держит блокировку базы на запись, поэтому
+    последние len(objs) id принадлежат этим строкам, по порядку вставки.
+    """
+    objs = model.objects.bulk_create(objs)
+    if objs and objs[0].pk is None:
+        pks = model.objects.order_by('-pk').values_list(
+            'pk', flat=True)[:len(objs)]
+        for obj, pk in zip(objs, reversed(pks)):
+            obj.pk = pk
+    return objs
+
+
+class BulkMixin:
+    """
+    Пакетные изменения на {ресурс}/bulk/ списком объектов: POST создаёт,
+    PATCH частично обновляет, DELETE удаляет объекты по bulk_key.
+    slug связанных объектов из bulk_related загружаются одним запросом
+    на модель, уникальность полей из bulk_unique проверяется одним
+    запросом на поле, запись идёт через bulk_create/bulk_update в одной
+    транзакции. В ответе для каждого элемента по порядку — статус и ключ
+    объекта или ошибки; элементы с ошибками не записываются.
+    """
+    bulk_key = 'id'
+    bulk_related = {}
+    bulk_unique = ()
+    related_objects = {}
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['related_objects'] = self.related_objects
+        return context
+
+    @action(detail=False, methods=['post', 'patch', 'delete'])
+    def bulk(self, request):
+        items = request.data
+        if not isinstance(items, list) or not items:
+            raise ValidationError(
+                {'non_field_errors': ['Передайте непустой список объектов.']}
+            )
+        if len(items) > BULK_MAX_ITEMS:
+            raise ValidationError({'non_field_errors': [
+                f'Не больше {BULK_MAX_ITEMS} объектов за запрос.'
+            ]})
+        handler = {
+            'POST': self.bulk_create_items,
+            'PATCH': self.bulk_update_items,
+            'DELETE': self.bulk_delete_items,
+        }[request.method]
+        return Response(
+            {'results': handler(items)}, status=status.HTTP_200_OK
+        )
+
+    def bulk_create_items(self, items):
+        results = [None] * len(items)
+        self.load_related(items)
+        valid = self.validate_items(
+            [(index, None, item) for index, item in enumerate(items)],
+            results
+        )
+        with transaction.atomic():
+            objs = self.perform_bulk_create(
+                [serializer.validated_data for _, serializer in valid]
+            )
+            self.bulk_changed(objs, created=True)
+        for (index, _), obj in zip(valid, objs):
+            results[index] = self.item_result(status.HTTP_201_CREATED, obj)
+        return results
+
+    def bulk_update_items(self, items):
+        results = [None] * len(items)
+        instances = self.find_instances(items, results)
+        self.load_related(items)
+        valid = self.validate_items(
+            [(index, instance, items[index])
+             for index, instance in instances.items()],
+            results, partial=True
+        )
+        with transaction.atomic():
+            objs = self.perform_bulk_update(
+                [(serializer.instance, serializer.validated_data)
+                 for _, serializer in valid]
+            )
+            self.bulk_changed(objs, created=False)
+        for index, serializer in valid:
+            results[index] = self.item_result(
+                status.HTTP_200_OK, serializer.instance
+            )
+        return results
+
+    def bulk_delete_items(self, items):
+        results = [None] * len(items)
+        instances = self.find_instances(items, results)
+        with transaction.atomic():
+            self.get_queryset().model.objects.filter(
+                pk__in=[instance.pk for instance in instances.values()]
+            ).delete()
+        for index, instance in instances.items():
+            results[index] = self.item_result(
+                status.HTTP_204_NO_CONTENT, instance
+            )
+        return results
+
+    def item_result(self, status_code, obj):
+        return {'status': status_code,
+                self.bulk_key: getattr(obj, self.bulk_key)}
+
+    def load_related(self, items):
+        slugs = {model: set() for model in self.bulk_related.values()}
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            for name, model in self.bulk_related.items():
+                value = item.get(name)
+                values = value if isinstance(value, list) else [value]
+                slugs[model].update(
+                    slug for slug in values if isinstance(slug, str)
+                )
+        self.related_objects = {
+            model: model.objects.in_bulk(list(values), field_name='slug')
+            for model, values in slugs.items()
+        }
+
+    def find_instances(self, items, results):
+        """Загружает объекты для PATCH и DELETE одним запросом."""
+        model = self.get_queryset().model
+        field = model._meta.get_field(self.bulk_key)
+        keys = {}
+        for index, item in enumerate(items):
+            try:
+                keys[index] = field.to_python(item[self.bulk_key])
+            except (KeyError, TypeError, DjangoValidationError):
+                results[index] = {
+                    'status': status.HTTP_400_BAD_REQUEST,
+                    'errors': {self.bulk_key: [
+                        'Укажите ключ объекта.'
+                    ]},
+                }
+        found = model.objects.in_bulk(
+            list(set(keys.values())), field_name=self.bulk_key
+        )
+        instances = {}
+        for index, key in keys.items():
+            if key in found:
+                instances[index] = found[key]
+            else:
+                results[index] = {
+                    'status': status.HTTP_404_NOT_FOUND,
+                    'errors': {'detail': 'Объект не найден.'},
+                }
+        return instances
+
+    def get_item_serializer(self, instance, data, partial):
+        serializer = self.get_serializer(instance, data=data,
+                                         partial=partial)
+        # Уникальность проверяется для всего пакета в check_unique.
+        for name in self.bulk_unique:
+            field = serializer.fields[name]
+            field.validators = [
+                validator for validator in field.validators
+                if not isinstance(validator, UniqueValidator)
+            ]
+        return serializer
+
+    def validate_items(self, entries, results, partial=False):
+        valid = []
+        for index, instance, item in entries:
+            serializer = self.get_item_serializer(instance, item, partial)
+            if serializer.is_valid():
+                valid.append((index, serializer))
+            else:
+                results[index] = {
+                    'status': status.HTTP_400_BAD_REQUEST,
+                    'errors': serializer.errors,
+                }
+        return self.check_unique(valid, results)
+
+    def check_unique(self, valid, results):
+        model = self.get_queryset().model
+        for name in self.bulk_unique:
+            claimed = {}
+            for index, serializer in valid:
+                if name in serializer.validated_data:
+                    claimed.setdefault(
+                        serializer.validated_data[name], []
+                    ).append(index)
+            taken = dict(model.objects.filter(
+                **{f'{name}__in': list(claimed)}
+            ).values_list(name, 'pk'))
+            conflicts = set()
+            for index, serializer in valid:
+                value = serializer.validated_data.get(name)
+                if value not in claimed:
+                    continue
+                owner = serializer.instance.pk if serializer.instance else None
+                if len(claimed[value]) > 1 or taken.get(value, owner) != owner:
+                    conflicts.add(index)
+                    results[index] = {
+                        'status': status.HTTP_400_BAD_REQUEST,
+                        'errors': {name: [UniqueValidator.message]},
+                    }
+            valid = [entry for entry in valid if entry[0] not in conflicts]
+        return valid
+
+    def perform_bulk_create(self, validated):
+        model = self.get_queryset().model
+        return model.objects.bulk_create(model(**data) for data in validated)
+
+    def perform_bulk_update(self, changes):
+        model = self.get_queryset().model
+        fields = set()
+        for instance, data in changes:
+            for name, value in data.items():
+                setattr(instance, name, value)
+                fields.add(name)
+        objs = [instance for instance, _ in changes]
+        if fields:
+            model.objects.bulk_update(objs, fields)
+        return objs
+
+    def bulk_changed(self, objs, created):
+        """
+        bulk_create и bulk_update не отправляют сигналы post_save,
+        поэтому кэш сбрасывается здесь; версии обновляют вьюсеты.
+        """
+        if objs:
+            invalidate(*CACHE_DEPENDENCIES[self.get_queryset().model])
@@ -0,0 +1,110 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.response import Response
+
+from .permissions import IsAdmin
+
+STATS_KEY = 'api:stats:{resource}:{event}'
+GENERATION_KEY = 'api:generation:{resource}'
+
+
+def api_cache():
+    return caches[settings.API_CACHE_ALIAS]
+
+
+def generation(resource):
+    """
+    Номер поколения ресурса входит в ключи кэша: инвалидация только
+    увеличивает номер, и старые ответы перестают находиться.
+    Новое поколение начинается с текущего времени, чтобы после
+    вытеснения счётчика не совпасть со старыми ключами.
+    """
+    return api_cache().get_or_set(
+        GENERATION_KEY.format(resource=resource), time.time_ns, None
+    )
+
+
+def invalidate(*resources):
+    """
+    Начинает новые поколения ресурсов после коммита текущей транзакции:
+    иначе параллельный запрос между сбросом и коммитом прочитал бы
+    старые данные и закэшировал их под новым поколением.
+    """
+    transaction.on_commit(lambda: bump_generations(resources))
+
+
+def bump_generations(resources):
+    cache = api_cache()
+    for resource in resources:
+        key = GENERATION_KEY.format(resource=resource)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), None)
+
+
+def record(resource, event):
+    cache = api_cache()
+    key = STATS_KEY.format(resource=resource, event=event)
+    if not cache.add(key, 1, None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+
+
+def stats(resources):
+    cache = api_cache()
+    return {
+        resource: {
+            event: cache.get(
+                STATS_KEY.format(resource=resource, event=event), 0
+            )
+            for event in ('hits', 'misses')
+        }
+        for resource in resources
+    }
+
+
+class CachedListMixin:
+    """
+    Кэширует ответ list() по хосту, пути, строке запроса и уровню
+    доступа: ссылки next/previous в ответе абсолютные.
+    cache_resource — ресурс вьюсета, cache_depends_on — ресурсы,
+    от изменения которых зависит ответ (включая сам ресурс).
+    """
+    cache_resource = None
+    cache_depends_on = ()
+
+    def get_cache_key(self, request):
+        principal = 'admin' if IsAdmin().has_permission(
+            request, self) else 'public'
+        generations = ':'.join(
+            str(generation(resource)) for resource in self.cache_depends_on
+        )
+        query = request.GET.urlencode()
+        digest = hashlib.md5(
+            f'{request.get_host()}{request.path}?{query}'.encode('utf-8')
+        ).hexdigest()
+        return (f'api:response:{self.cache_resource}:{principal}:'
+                f'{generations}:{digest}')
+
+    def list(self, request, *args, **kwargs):
+        cache = api_cache()
+        key = self.get_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            record(self.cache_resource, 'hits')
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+        record(self.cache_resource, 'misses')
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, settings.API_CACHE_TIMEOUT)
+        response['X-Cache'] = 'MISS'
+        return response
@@ -0,0 +1,46 @@
+from calendar import timegm
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+class ConditionalGetMixin:
+    """
+    ETag и Last-Modified для list() и retrieve() из хранимых счётчиков
+    версий: валидаторы считаются одним запросом до сериализации,
+    и при совпадении с If-None-Match / If-Modified-Since ответ 304
+    отдаётся без выборки и сериализации данных.
+    """
+    conditional_actions = ('list', 'retrieve')
+
+    def get_version(self):
+        """
+        Возвращает (метка версии, datetime изменения) или None,
+        если объект не найден и ответ должен сформироваться обычным путём.
+        """
+        raise NotImplementedError
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional(super().retrieve, request, *args, **kwargs)
+
+    def conditional(self, handler, request, *args, **kwargs):
+        version = None
+        if self.action in self.conditional_actions:
+            version = self.get_version()
+        if version is None:
+            return handler(request, *args, **kwargs)
+        tag, modified = version
+        etag = quote_etag(f'{tag}-{request.accepted_renderer.format}')
+        last_modified = timegm(modified.utctimetuple())
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+        return response
@@ -0,0 +1,71 @@
+import hashlib
+
+from django.conf import settings
+from django.db.models import Count, F, IntegerField
+from django.db.models.functions import Cast
+from reviews.models import Genre_title
+
+from .cache import api_cache, generation
+
+FACETS_KEY = 'api:facets:{generation}:{digest}'
+# Параметры страницы не меняют набор произведений и не входят в ключ.
+IGNORED_PARAMS = ('page', 'facets')
+
+
+def facet_order(item):
+    return -item['count'], item['slug'] or ''
+
+
+def facet_counts(queryset):
+    """
+    Количество произведений из queryset по категориям, жанрам и
+    десятилетиям: категории и десятилетия считаются одной группировкой,
+    жанры — группировкой связей Genre_title с подзапросом по queryset.
+    """
+    queryset = queryset.order_by()
+    categories, decades = {}, {}
+    rows = queryset.values(
+        'category__slug', 'category__name',
+        decade=Cast(F('year') / 10 * 10, IntegerField())
+    ).annotate(count=Count('pk'))
+    for row in rows:
+        category = categories.setdefault(row['category__slug'], {
+            'slug': row['category__slug'],
+            'name': row['category__name'],
+            'count': 0,
+        })
+        category['count'] += row['count']
+        decades[row['decade']] = decades.get(row['decade'], 0) + row['count']
+    genres = Genre_title.objects.filter(
+        title__in=queryset.values('pk'), genre__isnull=False
+    ).order_by().values(
+        slug=F('genre__slug'), name=F('genre__name')
+    ).annotate(count=Count('title'))
+    return {
+        'category': sorted(
+            categories.values(), key=facet_order
+        ),
+        'genre': sorted(
+            (dict(row) for row in genres), key=facet_order
+        ),
+        'decade': [
+            {'decade': decade, 'count': count}
+            for decade, count in sorted(decades.items())
+        ],
+    }
+
+
+def cached_facets(queryset, params):
+    """
+    Счётчики хранятся в кэше по набору фильтров и поколению ресурса
+    facets, которое сбрасывают записи произведений и их жанров.
+    """
+    query = sorted(
+        (key, value) for key, values in params.lists()
+        if key not in IGNORED_PARAMS for value in values
+    )
+    digest = hashlib.md5(repr(query).encode('utf-8')).hexdigest()
+    key = FACETS_KEY.format(generation=generation('facets'), digest=digest)
+    return api_cache().get_or_set(
+        key, lambda: facet_counts(queryset), settings.API_CACHE_TIMEOUT
+    )
@@ -0,0 +1,70 @@
+from django.utils.encoding import smart_str
+from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
+
+
+class PrefetchedSlugRelatedField(serializers.SlugRelatedField):
+    """
+    SlugRelatedField, который ищет объекты среди загруженных заранее:
+    context['related_objects'] — {модель: {slug: объект}}. Без них
+    работает как обычный SlugRelatedField; с many=True список
+    разрешается одним запросом в SlugListRelatedField.
+    """
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return SlugListRelatedField(**list_kwargs)
+
+    def get_objects(self, slugs):
+        """{slug: объект} для найденных slug."""
+        related = self.context.get('related_objects', {})
+        objects = related.get(self.get_queryset().model)
+        if objects is not None:
+            return objects
+        return self.get_queryset().in_bulk(
+            list(slugs), field_name=self.slug_field
+        )
+
+    def to_internal_value(self, data):
+        related = self.context.get('related_objects', {})
+        objects = related.get(self.get_queryset().model)
+        if objects is None:
+            return super().to_internal_value(data)
+        try:
+            return objects[data]
+        except KeyError:
+            self.fail('does_not_exist', slug_name=self.slug_field,
+                      value=smart_str(data))
+        except TypeError:
+            self.fail('invalid')
+
+
+class SlugListRelatedField(serializers.ManyRelatedField):
+    """
+    Список slug, который разрешается одним запросом slug__in вместо
+    запроса на каждый элемент. Все неизвестные slug попадают в одну
+    ошибку; повторы отбрасываются.
+    """
+    default_error_messages = {
+        'does_not_exist': 'Объекты с {slug_name}={value} не существуют.',
+    }
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        if not all(isinstance(slug, str) for slug in data):
+            self.child_relation.fail('invalid')
+        slugs = list(dict.fromkeys(data))
+        objects = self.child_relation.get_objects(slugs)
+        missing = [slug for slug in slugs if slug not in objects]
+        if missing:
+            self.fail('does_not_exist',
+                      slug_name=self.child_relation.slug_field,
+                      value=', '.join(missing))
+        return [objects[slug] for slug in slugs]
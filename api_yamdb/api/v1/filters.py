@@ -1,16 +1,33 @@
 import django_filters
+from django.db.models import Exists, OuterRef
 from django_filters import FilterSet
-from reviews.models import Title
+from reviews.models import Genre_title, Title
+
+GENRE_MODES = (
+    ('any', 'Любой из жанров'),
+    ('all', 'Все жанры'),
+)
+
+
+class CharInFilter(django_filters.BaseInFilter, django_filters.CharFilter):
+    pass
 
 
 class TitleFilter(FilterSet):
-    category = django_filters.CharFilter(
+    """
+    Фильтры списка произведений. category и genre принимают slug или
+    список slug через запятую и сравниваются точно; жанры проверяются
+    подзапросом EXISTS по Genre_title, без JOIN и DISTINCT.
+    genre_mode=all оставляет произведения со всеми указанными жанрами.
+    """
+    category = CharInFilter(
         field_name='category__slug',
-        lookup_expr='contains'
+        lookup_expr='in'
     )
-    genre = django_filters.CharFilter(
-        field_name='genre__slug',
-        lookup_expr='contains'
+    genre = CharInFilter(method='filter_genre')
+    genre_mode = django_filters.ChoiceFilter(
+        choices=GENRE_MODES,
+        method='filter_genre_mode'
     )
     name = django_filters.CharFilter(
         field_name='name',
@@ -18,9 +35,41 @@ class TitleFilter(FilterSet):
     )
     year = django_filters.NumberFilter(
         field_name='year',
-        lookup_expr='contains'
+        lookup_expr='exact'
+    )
+    year_min = django_filters.NumberFilter(
+        field_name='year',
+        lookup_expr='gte'
+    )
+    year_max = django_filters.NumberFilter(
+        field_name='year',
+        lookup_expr='lte'
     )
 
     class Meta:
         model = Title
         fields = '__all__'
+
+    @staticmethod
+    def has_genres(slugs):
+        return Exists(Genre_title.objects.filter(
+            title=OuterRef('pk'), genre__slug__in=slugs
+        ))
+
+    def filter_genre(self, queryset, name, value):
+        if self.form.cleaned_data.get('genre_mode') == 'all':
+            groups = [[slug] for slug in sorted(set(value))]
+        else:
+            groups = [value]
+        # Django 2.2 не фильтрует по выражению Exists напрямую,
+        # поэтому подзапрос сначала добавляется аннотацией.
+        for index, slugs in enumerate(groups):
+            alias = f'_has_genres_{index}'
+            queryset = queryset.annotate(
+                **{alias: self.has_genres(slugs)}
+            ).filter(**{alias: True})
+        return queryset
+
+    def filter_genre_mode(self, queryset, name, value):
+        # Режим применяется в filter_genre.
+        return queryset
@@ -0,0 +1,56 @@
+from django.http import Http404
+
+
+class NestedParentMixin:
+    """
+    Вложенный маршрут (отзывы произведения, комментарии отзыва).
+    Родитель загружается не больше одного раза за запрос, тем же
+    запросом, что и версия для ETag. Дочерние объекты выбираются
+    по id из URL без отдельной проверки родителя: для объекта чужого
+    или несуществующего родителя выборка просто пуста.
+    """
+    parent_model = None
+    # {поле родителя: kwarg URL} — как найти родителя.
+    parent_lookup = {}
+    # {поле дочерней модели: kwarg URL} — как отобрать дочерние объекты.
+    child_lookup = {}
+    # Поле дочерней модели, в которое при создании пишется id родителя.
+    parent_field = None
+    version_prefix = None
+
+    def get_parent(self):
+        """(pk, version, modified) родителя или None, если его нет."""
+        if not hasattr(self, '_parent'):
+            self._parent = self.parent_model.objects.filter(**{
+                field: self.kwargs[kwarg]
+                for field, kwarg in self.parent_lookup.items()
+            }).values_list('pk', 'version', 'modified').first()
+        return self._parent
+
+    def get_parent_or_404(self):
+        parent = self.get_parent()
+        if parent is None:
+            raise Http404
+        return parent
+
+    def get_version(self):
+        parent = self.get_parent()
+        if parent is None:
+            return None
+        pk, version, modified = parent
+        return f'{self.version_prefix}-{pk}-{version}', modified
+
+    def get_queryset(self):
+        if self.action == 'list':
+            # Для списка родитель уже прочитан в get_version.
+            self.get_parent_or_404()
+        return super().get_queryset().filter(**{
+            field: self.kwargs[kwarg]
+            for field, kwarg in self.child_lookup.items()
+        })
+
+    def perform_create(self, serializer):
+        serializer.save(
+            author=self.request.user,
+            **{self.parent_field: self.get_parent_or_404()[0]}
+        )
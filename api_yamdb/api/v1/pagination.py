@@ -0,0 +1,189 @@
+from base64 import b64decode, b64encode
+from collections import OrderedDict
+from urllib import parse
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset-пагинация по ключу ordering: по умолчанию (pub_date, id)
+    в порядке убывания, вьюсет может задать свой ключ атрибутом
+    keyset_ordering. Последнее поле ключа должно быть уникальным, поля
+    не должны принимать NULL. Страница выбирается условием по ключу
+    последней записи, поэтому не нужны ни COUNT(*), ни OFFSET,
+    а курсоры не сдвигаются при добавлении новых записей.
+    """
+    page_size = api_settings.PAGE_SIZE
+    # Параметр запроса с размером страницы; None — размер фиксирован.
+    page_size_query_param = None
+    max_page_size = None
+    ordering = ('-pub_date', '-id')
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Неверный курсор.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = request.build_absolute_uri()
+        self.ordering = getattr(view, 'keyset_ordering', self.ordering)
+        self.fields = [
+            queryset.model._meta.get_field(field.lstrip('-'))
+            for field in self.ordering
+        ]
+        self.page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+        self.has_cursor = cursor is not None
+        self.reverse = self.has_cursor and cursor[0]
+
+        queryset = queryset.order_by(*self.get_ordering(self.reverse))
+        if self.has_cursor:
+            queryset = queryset.filter(self.after(cursor[1], self.reverse))
+
+        results = list(queryset[:self.page_size + 1])
+        self.has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if self.reverse:
+            self.page.reverse()
+        return self.page
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                size = int(request.query_params[self.page_size_query_param])
+            except (KeyError, ValueError):
+                size = 0
+            if size > 0:
+                return min(size, self.max_page_size or size)
+        return self.page_size
+
+    def get_ordering(self, reverse):
+        if not reverse:
+            return self.ordering
+        return [
+            field[1:] if field.startswith('-') else f'-{field}'
+            for field in self.ordering
+        ]
+
+    def after(self, values, reverse):
+        """
+        Условие «строка идёт после ключа values»: первое различающееся
+        поле ключа больше или меньше значения, все поля до него равны.
+        """
+        condition = Q()
+        equal = {}
+        for field, value in zip(self.get_ordering(reverse), values):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        return condition
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'previous': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        if not self.page:
+            return None
+        if self.reverse or self.has_more:
+            return self.encode_cursor(False, self.page[-1])
+        return None
+
+    def get_previous_link(self):
+        if not self.page:
+            return None
+        if (self.has_cursor and not self.reverse) or (
+                self.reverse and self.has_more):
+            return self.encode_cursor(True, self.page[0])
+        return None
+
+    def encode_cursor(self, reverse, obj):
+        querystring = parse.urlencode({
+            'r': int(reverse),
+            'v': [field.value_to_string(obj) for field in self.fields],
+        }, doseq=True)
+        encoded = b64encode(querystring.encode('ascii')).decode('ascii')
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, encoded
+        )
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            querystring = b64decode(encoded.encode('ascii')).decode('ascii')
+            tokens = parse.parse_qs(querystring, keep_blank_values=True)
+            reverse = bool(int(tokens['r'][0]))
+            values = [
+                field.to_python(value)
+                for field, value in zip(self.fields, tokens['v'])
+            ]
+        except (TypeError, ValueError, KeyError, IndexError,
+                ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        if len(values) != len(self.fields) or None in values:
+            raise NotFound(self.invalid_cursor_message)
+        return reverse, values
+
+
+class ReviewCommentPagination(BasePagination):
+    """
+    Пагинация отзывов и комментариев: по номеру страницы по умолчанию,
+    keyset-режим включается параметром ?pagination=cursor, наличием
+    курсора в запросе или атрибутом вьюсета keyset_pagination = True.
+    """
+    mode_query_param = 'pagination'
+    keyset_mode = 'cursor'
+    page_number_class = PageNumberPagination
+    keyset_class = KeysetPagination
+
+    def use_keyset(self, request, view):
+        if getattr(view, 'keyset_pagination', False):
+            return True
+        params = request.query_params
+        return (
+            params.get(self.mode_query_param) == self.keyset_mode
+            or self.keyset_class.cursor_query_param in params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_keyset(request, view):
+            self.paginator = self.keyset_class()
+        else:
+            self.paginator = self.page_number_class()
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.page_number_class().get_paginated_response_schema(schema)
+
+
+class RankingPagination(KeysetPagination):
+    """
+    Страницы рейтинга: ключ задаёт вьюсет по виду рейтинга, размер
+    страницы — параметр limit.
+    """
+    page_size = 10
+    page_size_query_param = 'limit'
+    max_page_size = 100
@@ -1,20 +1,20 @@
 from rest_framework import permissions
 
 
+def has_admin_rights(user):
+    return user.is_authenticated and (
+        user.is_admin
+        or user.is_staff
+        or user.is_superuser
+    )
+
+
 class IsAdmin(permissions.BasePermission):
     def has_permission(self, request, view):
-        return request.user.is_authenticated and (
-            request.user.is_admin
-            or request.user.is_staff
-            or request.user.is_superuser
-        )
+        return has_admin_rights(request.user)
 
     def has_object_permission(self, request, view, obj):
-        return request.user.is_authenticated and (
-            request.user.is_admin
-            or request.user.is_staff
-            or request.user.is_superuser
-        )
+        return has_admin_rights(request.user)
 
 
 class IsAuthorModeratorAdminOrReadOnly(permissions.BasePermission):
@@ -25,12 +25,11 @@ class IsAuthorModeratorAdminOrReadOnly(permissions.BasePermission):
         if request.method == 'POST':
             return request.user.is_authenticated
 
+        # author_id вместо author: проверка не загружает автора из базы.
         return request.user.is_authenticated and (
-            request.user == obj.author
+            obj.author_id == request.user.pk
             or request.user.is_moderator
-            or request.user.is_admin
-            or request.user.is_staff
-            or request.user.is_superuser
+            or has_admin_rights(request.user)
         )
 
 
@@ -1,7 +1,14 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Q
 from rest_framework import serializers
-from reviews.models import Category, Comment, Genre, Review, Title
+from rest_framework.settings import api_settings
+from reviews.models import (Category, Comment, Genre, Genre_title, Review,
+                            ScoreHistogram, Title, TitleRanking)
+from reviews.rankings import activity
 from users.models import User
 
+from .fields import PrefetchedSlugRelatedField
+
 
 class ReviewSerializers(serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
@@ -12,17 +19,25 @@ class ReviewSerializers(serializers.ModelSerializer):
         model = Review
         fields = ('id', 'text', 'author', 'score', 'pub_date')
 
-    def validate(self, data):
-        if self.context['request'].method != 'POST':
-            return data
-        title = self.context['view'].kwargs.get('title_id')
-        author = self.context['request'].user
-        if Review.objects.filter(
-                author=author, title=title).exists():
-            raise serializers.ValidationError(
-                'Вы уже написали отзыв к этому произведению.'
-            )
-        return data
+    def create(self, validated_data):
+        # Повтор ловит ограничение unique_combination, а не проверка
+        # перед вставкой: так нет лишнего запроса и гонки между
+        # параллельными запросами одного автора. Отзыв ищется только
+        # после ошибки, чтобы не выдать за повтор другие нарушения.
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError:
+            if not Review.objects.filter(
+                title_id=validated_data['title_id'],
+                author=validated_data['author'],
+            ).exists():
+                raise
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
+                    'Вы уже написали отзыв к этому произведению.'
+                ]
+            })
 
 
 class CommentSerializers(serializers.ModelSerializer):
@@ -68,12 +83,70 @@ class TitleReadSerializer(serializers.ModelSerializer):
         )
 
 
+class RatingStatsSerializer(serializers.ModelSerializer):
+    """
+    Статистика оценок произведения из хранимых агрегатов:
+    число оценок, среднее, медиана и распределение оценок 1–10.
+    """
+    count = serializers.IntegerField(source='rating_count', read_only=True)
+    mean = serializers.SerializerMethodField()
+    median = serializers.SerializerMethodField()
+    histogram = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Title
+        fields = ('id', 'count', 'mean', 'median', 'histogram')
+
+    def get_mean(self, obj):
+        if not obj.rating_count:
+            return None
+        return round(obj.rating_sum / obj.rating_count, 2)
+
+    def get_median(self, obj):
+        histogram = getattr(obj, 'score_histogram', None)
+        return histogram.median() if histogram else None
+
+    def get_histogram(self, obj):
+        histogram = getattr(obj, 'score_histogram', None)
+        if histogram is None:
+            return {str(score): 0 for score in ScoreHistogram.SCORES}
+        return {
+            str(score): count for score, count in histogram.counts().items()
+        }
+
+
+def set_title_genres(genres):
+    """
+    Приводит жанры произведений к genres — {id произведения: жанры}:
+    одна выборка текущих связей, удаляются и вставляются одним запросом
+    только изменившиеся.
+    """
+    current = {}
+    for link in Genre_title.objects.filter(title_id__in=genres):
+        current.setdefault(link.title_id, {})[link.genre_id] = link.pk
+    removed, added = [], []
+    for title_id, title_genres in genres.items():
+        links = current.get(title_id, {})
+        genre_ids = {genre.pk for genre in title_genres}
+        removed.extend(
+            pk for genre_id, pk in links.items() if genre_id not in genre_ids
+        )
+        added.extend(
+            Genre_title(title_id=title_id, genre=genre)
+            for genre in dict.fromkeys(title_genres)
+            if genre.pk not in links
+        )
+    if removed:
+        Genre_title.objects.filter(pk__in=removed).delete()
+    Genre_title.objects.bulk_create(added)
+
+
 class TitleCreateSerializer(serializers.ModelSerializer):
-    category = serializers.SlugRelatedField(
+    category = PrefetchedSlugRelatedField(
         slug_field='slug',
         queryset=Category.objects.all()
     )
-    genre = serializers.SlugRelatedField(
+    genre = PrefetchedSlugRelatedField(
         many=True,
         slug_field='slug',
         queryset=Genre.objects.all()
@@ -90,6 +163,24 @@ class TitleCreateSerializer(serializers.ModelSerializer):
             'genre',
         )
 
+    def create(self, validated_data):
+        genres = validated_data.pop('genre', [])
+        with transaction.atomic():
+            title = Title.objects.create(**validated_data)
+            Genre_title.objects.bulk_create(
+                Genre_title(title=title, genre=genre) for genre in genres
+            )
+        return title
+
+    def update(self, instance, validated_data):
+        genres = validated_data.pop('genre', None)
+        with transaction.atomic():
+            if genres is not None:
+                set_title_genres({instance.pk: genres})
+            # Сохранение произведения после связей сбрасывает кэш и версию
+            # уже с новыми жанрами.
+            return super().update(instance, validated_data)
+
 
 class UserSerializer(serializers.ModelSerializer):
     """
@@ -141,18 +232,102 @@ class UserAdminSerializer(serializers.ModelSerializer):
         return data
 
 
-class SignUpSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = User
-        fields = ('username', 'email')
+class SignUpSerializer(serializers.Serializer):
+    """
+    Регистрация за одно чтение: validate() одним запросом находит
+    пользователей с тем же username или email. Пользователь с той же
+    парой становится instance и получает новый код без записи в базу,
+    иначе создаётся новый пользователь. Письмо с кодом — отдельная
+    запись в очередь писем в той же транзакции.
+    """
+    username = serializers.SlugField(max_length=150)
+    email = serializers.EmailField(max_length=254)
 
     def validate(self, data):
-        if self.initial_data.get('username') == 'me':
+        if data['username'] == 'me':
             raise serializers.ValidationError(
                 {"username": ["Вы не можете использоват этот username!"]}
             )
+        users = User.objects.filter(
+            Q(username=data['username']) | Q(email=data['email'])
+        ).only('id', 'username', 'email', 'last_login')[:2]
+        errors = {}
+        for user in users:
+            if (user.username, user.email) == (data['username'],
+                                               data['email']):
+                self.instance = user
+            elif user.username == data['username']:
+                errors['username'] = [
+                    'Пользователь с таким username уже существует.'
+                ]
+            else:
+                errors['email'] = [
+                    'Пользователь с таким email уже существует.'
+                ]
+        if errors:
+            raise serializers.ValidationError(errors)
         return data
 
+    def create(self, validated_data):
+        try:
+            with transaction.atomic():
+                return User.objects.create(**validated_data)
+        except IntegrityError:
+            # Параллельная регистрация с тем же username или email.
+            raise serializers.ValidationError(
+                'Пользователь с таким username или email уже существует.'
+            )
+
+    def update(self, instance, validated_data):
+        # Код подписывается, а не хранится: менять в базе нечего.
+        return instance
+
+
+class SearchQuerySerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=200)
+    type = serializers.ChoiceField(
+        choices=('titles', 'reviews', 'comments'), default='titles'
+    )
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=10)
+    offset = serializers.IntegerField(min_value=0, default=0)
+
+
+class SearchHitSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    title_id = serializers.IntegerField()
+    review_id = serializers.IntegerField()
+    snippet = serializers.CharField()
+    rank = serializers.FloatField()
+
+
+class RankingQuerySerializer(serializers.Serializer):
+    genre = serializers.SlugField(required=False)
+    category = serializers.SlugField(required=False)
+    min_reviews = serializers.IntegerField(min_value=0, default=0)
+
+    def validate(self, data):
+        if 'genre' in data and 'category' in data:
+            raise serializers.ValidationError(
+                'Рейтинг строится по жанру или по категории, не по обоим.'
+            )
+        return data
+
+
+class RankingSerializer(serializers.ModelSerializer):
+    title = TitleReadSerializer(read_only=True)
+    score = serializers.SerializerMethodField()
+    trending = serializers.SerializerMethodField()
+
+    class Meta:
+        model = TitleRanking
+        fields = ('title', 'score', 'review_count', 'trending')
+
+    def get_score(self, obj):
+        return round(obj.score, 2)
+
+    def get_trending(self, obj):
+        return round(activity(obj.trending), 2)
+
 
 class GetTokenSerializer(serializers.Serializer):
     username = serializers.SlugField(required=True)
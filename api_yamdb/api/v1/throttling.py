@@ -0,0 +1,43 @@
+import hashlib
+
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class AuthIPThrottle(SimpleRateThrottle):
+    """Общий лимит запросов регистрации и получения токена с одного IP."""
+    scope = 'auth_ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {
+            'scope': self.scope,
+            'ident': self.get_ident(request),
+        }
+
+
+class AuthFieldThrottle(SimpleRateThrottle):
+    """
+    Лимит запросов на значение поля field из тела запроса, независимо
+    от IP: не даёт рассылать письма на один адрес или подбирать код
+    для одного пользователя из разных сетей.
+    """
+    field = None
+
+    def get_cache_key(self, request, view):
+        value = request.data.get(self.field) if hasattr(
+            request.data, 'get') else None
+        if not isinstance(value, str) or not value.strip():
+            return None
+        ident = hashlib.md5(
+            value.strip().lower().encode('utf-8')
+        ).hexdigest()
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+
+class SignUpEmailThrottle(AuthFieldThrottle):
+    scope = 'signup_email'
+    field = 'email'
+
+
+class TokenUsernameThrottle(AuthFieldThrottle):
+    scope = 'token_username'
+    field = 'username'
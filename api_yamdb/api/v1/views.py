@@ -1,71 +1,75 @@
-import uuid
-
-from django.core.mail import send_mail
-from django.db.models import Avg
+from django.db import transaction
+from django.db.models import F
 from django.shortcuts import get_object_or_404
 from rest_framework import filters, mixins, status, viewsets
-from rest_framework.decorators import action, api_view
+from rest_framework.decorators import (action, api_view,
+                                       permission_classes, throttle_classes)
+from rest_framework.exceptions import ValidationError
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import (IsAuthenticated,
                                         IsAuthenticatedOrReadOnly)
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
-from reviews.models import Category, Genre, Review, Title
+from reviews.models import (Category, Comment, Genre, Genre_title, Review,
+                            Title, TitleRanking)
+from reviews.search import get_backend
+from reviews.versions import touch_titles
+from users.authentication import token_for_user
 from users.models import User
+from users.outbox import enqueue
+from users.tokens import confirmation_code_generator
 
-from api_yamdb.settings import ADMIN_EMAIL
-
+from .bulk import BulkMixin, bulk_create_with_pks
+from .cache import CachedListMixin, stats
+from .conditional import ConditionalGetMixin
+from .facets import cached_facets
 from .filters import TitleFilter
+from .nested import NestedParentMixin
+from .pagination import RankingPagination, ReviewCommentPagination
 from .permissions import IsAdmin, IsAuthorModeratorAdminOrReadOnly, ReadOnly
 from .serializers import (CategorySerializer, CommentSerializers,
                           GenreSerializer, GetTokenSerializer,
-                          ReviewSerializers, SignUpSerializer,
-                          TitleCreateSerializer, TitleReadSerializer,
-                          UserAdminSerializer, UserSerializer)
+                          RankingQuerySerializer, RankingSerializer,
+                          RatingStatsSerializer, ReviewSerializers,
+                          SearchHitSerializer, SearchQuerySerializer,
+                          SignUpSerializer, TitleCreateSerializer,
+                          TitleReadSerializer,
+                          UserAdminSerializer, UserSerializer,
+                          set_title_genres)
+from .throttling import (AuthIPThrottle, SignUpEmailThrottle,
+                         TokenUsernameThrottle)
 
+RATING_STATS_MAX_IDS = 1000
 
-class ReviewViewSet(viewsets.ModelViewSet):
+
+class ReviewViewSet(NestedParentMixin, ConditionalGetMixin,
+                    viewsets.ModelViewSet):
+    queryset = Review.objects.select_related('author')
     serializer_class = ReviewSerializers
-    pagination_class = PageNumberPagination
+    pagination_class = ReviewCommentPagination
+    keyset_pagination = False
     permission_classes = (IsAuthorModeratorAdminOrReadOnly,
                           IsAuthenticatedOrReadOnly)
-
-    def get_queryset(self):
-        title = get_object_or_404(
-            Title,
-            pk=self.kwargs['title_id']
-        )
-        return title.reviews.all()
-
-    def perform_create(self, serializer):
-        title = get_object_or_404(
-            Title,
-            pk=self.kwargs['title_id']
-        )
-        serializer.save(author=self.request.user, title=title)
+    parent_model = Title
+    parent_lookup = {'pk': 'title_id'}
+    child_lookup = {'title_id': 'title_id'}
+    parent_field = 'title_id'
+    version_prefix = 'reviews'
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(NestedParentMixin, ConditionalGetMixin,
+                     viewsets.ModelViewSet):
+    queryset = Comment.objects.select_related('author')
     serializer_class = CommentSerializers
-    pagination_class = PageNumberPagination
+    pagination_class = ReviewCommentPagination
+    keyset_pagination = False
     permission_classes = (IsAuthorModeratorAdminOrReadOnly,
                           IsAuthenticatedOrReadOnly)
-
-    def get_queryset(self):
-        review = get_object_or_404(
-            Review,
-            pk=self.kwargs['review_id'],
-            title=self.kwargs['title_id']
-        )
-        return review.comments.all()
-
-    def perform_create(self, serializer):
-        review = get_object_or_404(
-            Review,
-            pk=self.kwargs['review_id'],
-            title=self.kwargs['title_id']
-        )
-        serializer.save(author=self.request.user, review=review)
+    parent_model = Review
+    parent_lookup = {'pk': 'review_id', 'title_id': 'title_id'}
+    child_lookup = {'review_id': 'review_id',
+                    'review__title_id': 'title_id'}
+    parent_field = 'review_id'
+    version_prefix = 'comments'
 
 
 class CreateListDestroyViewSet(mixins.CreateModelMixin,
@@ -76,7 +80,7 @@ class CreateListDestroyViewSet(mixins.CreateModelMixin,
     pass
 
 
-class CategoryViewSet(CreateListDestroyViewSet):
+class CategoryViewSet(BulkMixin, CachedListMixin, CreateListDestroyViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     pagination_class = PageNumberPagination
@@ -84,9 +88,18 @@ class CategoryViewSet(CreateListDestroyViewSet):
     filter_backends = (filters.SearchFilter,)
     search_fields = ('name',)
     lookup_field = 'slug'
+    cache_resource = 'categories'
+    cache_depends_on = ('categories',)
+    bulk_key = 'slug'
+    bulk_unique = ('slug',)
+
+    def bulk_changed(self, objs, created):
+        super().bulk_changed(objs, created)
+        if objs and not created:
+            touch_titles(category__in=objs)
 
 
-class GenreViewSet(CreateListDestroyViewSet):
+class GenreViewSet(BulkMixin, CachedListMixin, CreateListDestroyViewSet):
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
     pagination_class = PageNumberPagination
@@ -94,20 +107,168 @@ class GenreViewSet(CreateListDestroyViewSet):
     filter_backends = (filters.SearchFilter,)
     search_fields = ('name',)
     lookup_field = 'slug'
+    cache_resource = 'genres'
+    cache_depends_on = ('genres',)
+    bulk_key = 'slug'
+    bulk_unique = ('slug',)
 
+    def bulk_changed(self, objs, created):
+        super().bulk_changed(objs, created)
+        if objs and not created:
+            touch_titles(genre__in=objs)
 
-class TitleViewSet(viewsets.ModelViewSet):
-    queryset = Title.objects.annotate(
-        rating=Avg('reviews__score')).order_by('name')
+
+class TitleViewSet(BulkMixin, CachedListMixin, ConditionalGetMixin,
+                   viewsets.ModelViewSet):
+    queryset = Title.objects.select_related(
+        'category'
+    ).prefetch_related('genre').order_by('name')
     pagination_class = PageNumberPagination
     permission_classes = (IsAdmin | ReadOnly,)
     filterset_class = TitleFilter
+    cache_resource = 'titles'
+    cache_depends_on = ('titles',)
+    conditional_actions = ('retrieve',)
+    bulk_related = {'category': Category, 'genre': Genre}
 
     def get_serializer_class(self):
         if self.action in ('list', 'retrieve'):
             return TitleReadSerializer
         return TitleCreateSerializer
 
+    def get_paginated_response(self, data):
+        """С ?facets=true добавляет к странице счётчики по фильтрам."""
+        response = super().get_paginated_response(data)
+        if self.request.query_params.get('facets') in ('true', '1'):
+            response.data['facets'] = cached_facets(
+                self.filter_queryset(self.get_queryset()),
+                self.request.query_params
+            )
+        return response
+
+    def get_version(self):
+        title_id = self.kwargs['pk']
+        if not title_id.isdigit():
+            return None
+        version = Title.objects.filter(pk=title_id).values_list(
+            'version', 'modified').first()
+        if version is None:
+            return None
+        return f'title-{title_id}-{version[0]}', version[1]
+
+    def perform_bulk_create(self, validated):
+        genres = [data.pop('genre', []) for data in validated]
+        titles = bulk_create_with_pks(
+            Title, [Title(**data) for data in validated]
+        )
+        Genre_title.objects.bulk_create(
+            Genre_title(title=title, genre=genre)
+            for title, title_genres in zip(titles, genres)
+            for genre in dict.fromkeys(title_genres)
+        )
+        return titles
+
+    def perform_bulk_update(self, changes):
+        genres = {
+            instance.pk: data.pop('genre')
+            for instance, data in changes if 'genre' in data
+        }
+        titles = super().perform_bulk_update(changes)
+        if genres:
+            set_title_genres(genres)
+        return titles
+
+    def bulk_changed(self, objs, created):
+        super().bulk_changed(objs, created)
+        if objs and not created:
+            touch_titles(pk__in=[title.pk for title in objs])
+
+    @action(detail=True, url_path='rating-stats')
+    def rating_stats(self, request, pk=None):
+        title = get_object_or_404(
+            Title.objects.select_related('score_histogram'), pk=pk
+        )
+        return Response(
+            RatingStatsSerializer(title).data, status=status.HTTP_200_OK
+        )
+
+    @action(detail=False, url_path='rating-stats',
+            url_name='rating-stats-bulk')
+    def rating_stats_bulk(self, request):
+        """Статистика оценок для списка произведений: ?ids=1,2,3."""
+        ids = request.query_params.get('ids', '').split(',')
+        if not all(pk.isdigit() for pk in ids):
+            raise ValidationError(
+                {'ids': ['Передайте id произведений через запятую.']}
+            )
+        if len(ids) > RATING_STATS_MAX_IDS:
+            raise ValidationError(
+                {'ids': [f'Не больше {RATING_STATS_MAX_IDS} id за запрос.']}
+            )
+        titles = Title.objects.filter(pk__in=ids).select_related(
+            'score_histogram').order_by('pk')
+        return Response(
+            RatingStatsSerializer(titles, many=True).data,
+            status=status.HTTP_200_OK
+        )
+
+
+class RankingViewSet(CachedListMixin, mixins.ListModelMixin,
+                     viewsets.GenericViewSet):
+    """
+    Рейтинги из таблицы TitleRanking: top — по взвешенной оценке,
+    reviewed — по числу отзывов, trending — по недавней активности.
+    ?genre= или ?category= выбирают рейтинг жанра или категории,
+    ?min_reviews= отсекает произведения с малым числом отзывов.
+    Таблица пересчитывается командой refreshrankings.
+    """
+    serializer_class = RankingSerializer
+    pagination_class = RankingPagination
+    permission_classes = (ReadOnly,)
+    cache_resource = 'rankings'
+    cache_depends_on = ('rankings',)
+    # Ключи совпадают с индексами ranking_*_idx: страница по курсору
+    # читается из индекса, без OFFSET.
+    orderings = {
+        'top': ('-score', 'title_id'),
+        'reviewed': ('-review_count', 'title_id'),
+        'trending': ('-trending', 'title_id'),
+    }
+
+    @property
+    def keyset_ordering(self):
+        return self.orderings[self.kwargs['kind']]
+
+    def get_scope(self, params):
+        for field, model in (('genre', Genre), ('category', Category)):
+            if field in params:
+                pk = get_object_or_404(
+                    model.objects.values_list('pk', flat=True),
+                    slug=params[field]
+                )
+                return f'{field}:{pk}'
+        return TitleRanking.GLOBAL_SCOPE
+
+    def get_queryset(self):
+        params = RankingQuerySerializer(data=self.request.query_params)
+        params.is_valid(raise_exception=True)
+        queryset = TitleRanking.objects.filter(
+            scope=self.get_scope(params.validated_data)
+        )
+        if params.validated_data['min_reviews']:
+            # Условие по выражению, а не по столбцу: иначе планировщик
+            # берёт индекс по review_count и сортирует всю область
+            # вместо чтения индекса нужного порядка до первых строк.
+            queryset = queryset.annotate(
+                reviews=F('review_count') + 0
+            ).filter(reviews__gte=params.validated_data['min_reviews'])
+        kind = self.kwargs['kind']
+        if kind == 'trending':
+            queryset = queryset.filter(trending__isnull=False)
+        return queryset.select_related('title__category').prefetch_related(
+            'title__genre'
+        ).order_by(*self.keyset_ordering)
+
 
 class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
@@ -121,40 +282,69 @@ class UserViewSet(viewsets.ModelViewSet):
             serializer_class=UserSerializer,
             pagination_class=None)
     def me(self, request):
+        # request.user может быть собран из claims токена без профиля.
+        user = get_object_or_404(User, pk=request.user.pk)
         if request.method == 'GET':
-            serializer = self.get_serializer(request.user)
+            serializer = self.get_serializer(user)
             return Response(serializer.data, status=status.HTTP_200_OK)
         serializer = self.get_serializer(
-            request.user, data=request.data, partial=True)
+            user, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
         serializer.save()
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
+@api_view(['GET'])
+@permission_classes([IsAdmin])
+def cache_stats(request):
+    return Response(
+        stats(('categories', 'genres', 'titles', 'rankings')),
+        status=status.HTTP_200_OK
+    )
+
+
+@api_view(['GET'])
+def search(request):
+    """
+    Полнотекстовый поиск: ?q=...&type=titles|reviews|comments.
+    Слова ищутся по префиксу, результаты упорядочены по релевантности,
+    совпадения во фрагменте выделены тегом <mark>.
+    """
+    params = SearchQuerySerializer(data=request.query_params)
+    params.is_valid(raise_exception=True)
+    hits = get_backend().search(
+        params.validated_data['type'],
+        params.validated_data['q'],
+        params.validated_data['limit'],
+        params.validated_data['offset'],
+    )
+    return Response(
+        {'results': SearchHitSerializer(hits, many=True).data},
+        status=status.HTTP_200_OK
+    )
+
+
 @api_view(['POST'])
+@throttle_classes([AuthIPThrottle, SignUpEmailThrottle])
 def signup(request):
-    user = User.objects.filter(**request.data)
-    if user.exists():
-        get_and_send_confirmation_code(user)
-        return Response(request.data, status=status.HTTP_200_OK)
-
     serializer = SignUpSerializer(data=request.data)
-    if serializer.is_valid(raise_exception=True):
-        serializer.save()
-        user = User.objects.filter(**serializer.data)
-        get_and_send_confirmation_code(user)
+    serializer.is_valid(raise_exception=True)
+    with transaction.atomic():
+        user = serializer.save()
+        send_confirmation_code(user)
     return Response(serializer.data, status=status.HTTP_200_OK)
 
 
 @api_view(['POST'])
+@throttle_classes([AuthIPThrottle, TokenUsernameThrottle])
 def token(request):
     serializer = GetTokenSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
     user = get_object_or_404(User, username=serializer.data['username'])
-    if serializer.data['confirmation_code'] == user.confirmation_code:
-        refresh = RefreshToken.for_user(user)
+    if confirmation_code_generator.use_code(
+            user, serializer.data['confirmation_code']):
         return Response(
-            {'token': str(refresh.access_token)},
+            {'token': str(token_for_user(user))},
             status=status.HTTP_200_OK
         )
     return Response(
@@ -163,12 +353,10 @@ def token(request):
     )
 
 
-def get_and_send_confirmation_code(user):
-    user.update(confirmation_code=str(uuid.uuid4()).split("-")[0])
-    send_mail(
+def send_confirmation_code(user):
+    enqueue(
         'Код подтверждения',
-        (f'Код подтверждения для пользователя "{user[0].username}":'
-         f' {user[0].confirmation_code}'),
-        ADMIN_EMAIL,
-        [user[0].email]
+        (f'Код подтверждения для пользователя "{user.username}":'
+         f' {confirmation_code_generator.make_code(user)}'),
+        user.email
     )
@@ -0,0 +1,76 @@
+import queue
+import threading
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    """
+    Пул соединений процесса. Выдаётся не больше size соединений
+    одновременно; свободные переиспользуются, последнее вернувшееся —
+    первым. Если пул исчерпан, get() ждёт до timeout секунд.
+
+    connect() открывает новое соединение (get() может получить свою
+    функцию открытия), check(connection) проверяет
+    свободное перед выдачей, reset(connection) возвращает соединение
+    в исходное состояние перед возвратом в пул. Соединение, которое
+    не прошло проверку или сброс, закрывается.
+    """
+
+    def __init__(self, connect, size, timeout, check=None, reset=None):
+        self.connect = connect
+        self.timeout = timeout
+        self.check = check
+        self.reset = reset
+        self.idle = queue.LifoQueue()
+        self.slots = threading.BoundedSemaphore(size)
+
+    def get(self, connect=None):
+        if not self.slots.acquire(timeout=self.timeout):
+            raise PoolTimeout(
+                f'Нет свободных соединений за {self.timeout} с'
+            )
+        try:
+            while True:
+                try:
+                    connection = self.idle.get_nowait()
+                except queue.Empty:
+                    return (connect or self.connect)()
+                if self.usable(connection, self.check):
+                    return connection
+        except BaseException:
+            self.slots.release()
+            raise
+
+    def put(self, connection):
+        try:
+            if self.usable(connection, self.reset):
+                self.idle.put(connection)
+        finally:
+            self.slots.release()
+
+    def usable(self, connection, action):
+        if connection.closed:
+            return False
+        try:
+            if action is not None:
+                action(connection)
+        except Exception:
+            self.discard(connection)
+            return False
+        return True
+
+    def discard(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def close(self):
+        while True:
+            try:
+                self.discard(self.idle.get_nowait())
+            except queue.Empty:
+                return
@@ -0,0 +1,112 @@
+import threading
+from functools import partial
+
+from django.db.backends.postgresql import base
+from psycopg2 import extensions
+
+from ..pool import ConnectionPool, PoolTimeout
+
+pools = {}
+pools_lock = threading.Lock()
+
+
+def check_connection(connection):
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+    if not connection.autocommit:
+        connection.rollback()
+
+
+def reset_connection(connection):
+    status = connection.info.transaction_status
+    if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+        raise base.Database.InterfaceError('Соединение потеряно')
+    if status != extensions.TRANSACTION_STATUS_IDLE:
+        connection.rollback()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    PostgreSQL с пулом соединений в процессе и проверкой соединений.
+
+    OPTIONS['pool_size'] — сколько соединений пул выдаёт одновременно
+    (0 — без пула, каждое соединение открывается заново),
+    OPTIONS['pool_timeout'] — сколько секунд ждать свободного.
+    Закрытие соединения возвращает его в пул, поэтому с пулом
+    CONN_MAX_AGE обычно оставляют 0.
+
+    CONN_HEALTH_CHECKS: соединение, пережившее запрос (CONN_MAX_AGE)
+    или взятое из пула, перед первым использованием проверяется
+    запросом SELECT 1 и при ошибке открывается заново.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pooled = False
+        self.health_check_done = False
+
+    @property
+    def health_checks(self):
+        return self.settings_dict.get('CONN_HEALTH_CHECKS', False)
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        self.pool_size = params.pop('pool_size', 0)
+        self.pool_timeout = params.pop('pool_timeout', 10)
+        return params
+
+    def get_pool(self):
+        with pools_lock:
+            if self.alias not in pools:
+                pools[self.alias] = ConnectionPool(
+                    None,
+                    self.pool_size,
+                    self.pool_timeout,
+                    check=check_connection if self.health_checks else None,
+                    reset=reset_connection,
+                )
+            return pools[self.alias]
+
+    def get_new_connection(self, conn_params):
+        # Новое соединение и соединение из пула уже проверены.
+        self.health_check_done = True
+        if not self.pool_size:
+            return super().get_new_connection(conn_params)
+        # Новые соединения для пула открывает бэкенд Django со всей его
+        # настройкой соединения; здесь — только уровень изоляции
+        # соединения, взятого из пула.
+        try:
+            connection = self.get_pool().get(
+                partial(super().get_new_connection, conn_params)
+            )
+        except PoolTimeout as error:
+            raise base.Database.OperationalError(str(error)) from error
+        self.pooled = True
+        options = self.settings_dict['OPTIONS']
+        self.isolation_level = options.get(
+            'isolation_level', connection.isolation_level
+        )
+        if self.isolation_level != connection.isolation_level:
+            connection.set_session(isolation_level=self.isolation_level)
+        return connection
+
+    def _close(self):
+        if self.connection is None or not self.pooled:
+            return super()._close()
+        self.pooled = False
+        with self.wrap_database_errors:
+            pools[self.alias].put(self.connection)
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        # Соединение, оставшееся с прошлого запроса, проверяется заново.
+        self.health_check_done = False
+
+    def ensure_connection(self):
+        if (self.connection is not None and self.health_checks
+                and not self.health_check_done
+                and not self.in_atomic_block):
+            self.health_check_done = True
+            if not self.is_usable():
+                self.close()
+        super().ensure_connection()
@@ -0,0 +1,28 @@
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    SQLite, в котором транзакции начинаются с BEGIN IMMEDIATE, а при
+    открытии соединения выполняются PRAGMA из OPTIONS['pragmas'].
+
+    При обычном BEGIN блокировка на запись берётся на первой записи,
+    а триггеры полнотекстового индекса отзывов сначала читают: когда
+    две транзакции повышают блокировку одновременно, SQLite сразу
+    отвечает «database is locked», не дожидаясь busy timeout.
+    С IMMEDIATE параллельные записи выстраиваются в очередь.
+    """
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        self.pragmas = params.pop('pragmas', {})
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute('BEGIN IMMEDIATE')
@@ -0,0 +1,128 @@
+import random
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+PIN_COOKIE = 'db_pinned'
+PIN_KEY = 'db:pinned:{user_id}'
+
+state = threading.local()
+
+
+@contextmanager
+def use_replicas(enabled=True):
+    """
+    Чтения внутри блока уходят на одну реплику из DATABASE_REPLICAS,
+    выбранную при входе: реплики отстают по-разному, и запрос не должен
+    видеть данные разной свежести.
+    """
+    previous = getattr(state, 'replica', None)
+    state.replica = (
+        random.choice(settings.DATABASE_REPLICAS)
+        if enabled and settings.DATABASE_REPLICAS else None
+    )
+    try:
+        yield
+    finally:
+        state.replica = previous
+
+
+def pin_to_primary(response, user_id):
+    """
+    Следующие REPLICA_PIN_SECONDS секунд пользователь читает с основной
+    базы и видит свои изменения, даже если реплики отстают. Отметка
+    хранится в кэше по id пользователя и действует для всех его
+    клиентов, но видна другим процессам только в общем кэше. Подписанная
+    cookie дополнительно закрепляет клиент, который её возвращает.
+    """
+    cache.set(PIN_KEY.format(user_id=user_id), True,
+              settings.REPLICA_PIN_SECONDS)
+    response.set_signed_cookie(
+        PIN_COOKIE, user_id, salt=PIN_COOKIE,
+        max_age=settings.REPLICA_PIN_SECONDS, httponly=True,
+        samesite='Lax'
+    )
+
+
+def token_user_id(request):
+    """
+    id пользователя из Bearer-токена или None. Токен только проверяется
+    по подписи, без запроса к базе: middleware выбирает базу до того,
+    как DRF аутентифицирует пользователя.
+    """
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    try:
+        raw_token = header and authentication.get_raw_token(header)
+        if not raw_token:
+            return None
+        token = authentication.get_validated_token(raw_token)
+    except AuthenticationFailed:
+        return None
+    return token.get(api_settings.USER_ID_CLAIM)
+
+
+def is_pinned(request):
+    # max_age проверяется по времени подписи, а не по сроку cookie.
+    if request.get_signed_cookie(
+        PIN_COOKIE, default=None, salt=PIN_COOKIE,
+        max_age=settings.REPLICA_PIN_SECONDS
+    ) is not None:
+        return True
+    user_id = token_user_id(request)
+    return user_id is not None and bool(
+        cache.get(PIN_KEY.format(user_id=user_id))
+    )
+
+
+class ReplicaRouter:
+    """
+    Чтения в запросах, отмеченных ReplicaMiddleware, идут на реплику,
+    выбранную для запроса; всё остальное — записи, команды, сигналы и чтения
+    в пишущих запросах — идёт в default. Миграции на реплики
+    не применяются: данные туда приходят репликацией.
+    """
+
+    def db_for_read(self, model, **hints):
+        return getattr(state, 'replica', None) or 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
+
+
+class ReplicaMiddleware:
+    """
+    Отправляет на реплики безопасные (GET, HEAD, OPTIONS) запросы.
+    После успешного пишущего запроса аутентифицированный пользователь
+    на время закрепляется за основной базой. Пользователь пишущего
+    запроса берётся из запроса, где его уже аутентифицировал DRF,
+    читающего — из Bearer-токена.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+        if request.method in SAFE_METHODS:
+            with use_replicas(not is_pinned(request)):
+                return self.get_response(request)
+        response = self.get_response(request)
+        user = getattr(request, 'user', None)
+        if (user is not None and user.is_authenticated
+                and response.status_code < 400):
+            pin_to_primary(response, user.pk)
+        return response
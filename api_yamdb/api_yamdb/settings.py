@@ -29,6 +29,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'api_yamdb.replicas.ReplicaMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -58,13 +59,85 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'api_yamdb.wsgi.application'
 
-DATABASES = {
+# sqlite3 для разработки и тестов, postgresql для продакшена.
+DB_ENGINE = os.getenv('DB_ENGINE', 'sqlite3')
+
+if DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'api_yamdb.backends.postgresql',
+            'NAME': os.getenv('DB_NAME', 'api_yamdb'),
+            'USER': os.getenv('POSTGRES_USER', ''),
+            'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
+            'HOST': os.getenv('DB_HOST', ''),
+            'PORT': os.getenv('DB_PORT', ''),
+            'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 0)),
+            'CONN_HEALTH_CHECKS': (
+                os.getenv('DB_CONN_HEALTH_CHECKS', 'True') == 'True'
+            ),
+            'OPTIONS': {
+                'pool_size': int(os.getenv('DB_POOL_SIZE', 20)),
+                'pool_timeout': float(os.getenv('DB_POOL_TIMEOUT', 10)),
+            },
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'api_yamdb.backends.sqlite3',
+            'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+            'OPTIONS': {
+                'pragmas': {
+                    'journal_mode': os.getenv('SQLITE_JOURNAL_MODE', 'wal'),
+                    'synchronous': os.getenv('SQLITE_SYNCHRONOUS', 'normal'),
+                    'mmap_size': int(
+                        os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)
+                    ),
+                    'busy_timeout': int(
+                        os.getenv('SQLITE_BUSY_TIMEOUT', 5000)
+                    ),
+                },
+            },
+            # Тестовая база в файле, а не в памяти: общая in-memory база
+            # блокирует таблицы целиком, и параллельные запросы в тестах
+            # падают вместо ожидания.
+            'TEST': {'NAME': os.path.join(BASE_DIR, 'test_db.sqlite3')},
+        }
+    }
+
+# Реплики для чтения: через запятую хосты PostgreSQL или файлы SQLite
+# (для локальной проверки подойдёт и файл основной базы).
+DATABASE_REPLICAS = []
+for number, location in enumerate(
+        filter(None, os.getenv('DB_REPLICAS', '').split(',')), 1):
+    alias = f'replica_{number}'
+    DATABASES[alias] = dict(DATABASES['default'], TEST={'MIRROR': 'default'})
+    DATABASES[alias]['HOST' if DB_ENGINE == 'postgresql' else 'NAME'] = (
+        location.strip()
+    )
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['api_yamdb.replicas.ReplicaRouter']
+# Сколько секунд после записи пользователь читает с основной базы.
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', 5))
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
     }
 }
 
+API_CACHE_ALIAS = 'default'
+API_CACHE_TIMEOUT = int(os.getenv('API_CACHE_TIMEOUT', 300))
+
+# Путь к классу reviews.search.SearchBackend; по умолчанию FTS5 для SQLite
+# и поиск по вхождению подстроки для остальных баз.
+SEARCH_BACKEND = os.getenv('SEARCH_BACKEND')
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': ('django.contrib.auth.password_validation'
@@ -108,7 +181,7 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.AllowAny',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.ClaimsJWTAuthentication',
     ],
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend'],
@@ -116,8 +189,31 @@ REST_FRAMEWORK = {
         'rest_framework.pagination.PageNumberPagination',
     ),
     'PAGE_SIZE': 5,
+    'DEFAULT_THROTTLE_RATES': {
+        'auth_ip': os.getenv('AUTH_IP_THROTTLE_RATE', '60/minute'),
+        'signup_email': os.getenv('SIGNUP_EMAIL_THROTTLE_RATE', '5/hour'),
+        'token_username': os.getenv(
+            'TOKEN_USERNAME_THROTTLE_RATE', '20/hour'
+        ),
+    },
 }
 
+# LRU ролей пользователей в процессе. Столько же секунд после выпуска
+# доверяется роли из claims токена, дальше она сверяется с базой.
+PRINCIPAL_CACHE_SIZE = int(os.getenv('PRINCIPAL_CACHE_SIZE', 1024))
+PRINCIPAL_CACHE_TTL = int(os.getenv('PRINCIPAL_CACHE_TTL', 60))
+
+# Рейтинги: сколько средних оценок добавляется к оценкам произведения,
+# период полураспада активности в часах, сдвиг средней оценки каталога,
+# после которого пересчитываются все произведения, и перекрытие
+# инкрементального пересчёта в секундах.
+RANKING_PRIOR_WEIGHT = int(os.getenv('RANKING_PRIOR_WEIGHT', 10))
+RANKING_TRENDING_HALF_LIFE = float(
+    os.getenv('RANKING_TRENDING_HALF_LIFE', 72)
+)
+RANKING_PRIOR_TOLERANCE = float(os.getenv('RANKING_PRIOR_TOLERANCE', 0.05))
+RANKING_REFRESH_OVERLAP = int(os.getenv('RANKING_REFRESH_OVERLAP', 60))
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
     'AUTH_HEADER_TYPES': ('Bearer',),
@@ -127,3 +223,18 @@ EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 ADMIN_EMAIL = 'admin@mail.ru'
+
+# Срок действия кода подтверждения, секунды. Использованный код перестаёт
+# действовать, потому что вход обновляет last_login пользователя.
+CONFIRMATION_CODE_TIMEOUT = int(
+    os.getenv('CONFIRMATION_CODE_TIMEOUT', 60 * 60 * 24)
+)
+
+# Письма уходят через очередь users.OutboxEmail и команду sendoutbox;
+# с EMAIL_OUTBOX_EAGER=True они отправляются сразу после коммита.
+EMAIL_OUTBOX_EAGER = os.getenv('EMAIL_OUTBOX_EAGER', '') == 'True'
+EMAIL_OUTBOX_BATCH_SIZE = int(os.getenv('EMAIL_OUTBOX_BATCH_SIZE', 100))
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv('EMAIL_OUTBOX_MAX_ATTEMPTS', 5))
+# Задержка перед повтором удваивается с каждой неудачной попыткой.
+EMAIL_OUTBOX_RETRY_DELAY = int(os.getenv('EMAIL_OUTBOX_RETRY_DELAY', 60))
+EMAIL_OUTBOX_LEASE = int(os.getenv('EMAIL_OUTBOX_LEASE', 300))
@@ -24,6 +24,7 @@ class TitleAdmin(admin.ModelAdmin):
     list_display = ('pk', 'name', 'year', 'category')
     list_editable = ('category',)
     search_fields = ('name', 'year',)
+    readonly_fields = ('rating_sum', 'rating_count')
     empty_value_display = '-пусто-'
 
 
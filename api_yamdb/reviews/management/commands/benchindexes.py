@@ -0,0 +1,209 @@
+import random
+import time
+from itertools import islice
+
+from api.v1.filters import TitleFilter
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from reviews.models import Category, Comment, Genre, Genre_title, Review, Title
+from reviews.ratings import rebuild_ratings
+from users.models import User
+
+BATCH_SIZE = 5000
+BENCH_PREFIX = 'bench-'
+BENCH_ALIAS = 'bench'
+SQLITE_ENGINE = 'api_yamdb.backends.sqlite3'
+
+
+def bulk_insert(model, objs, using):
+    objs = iter(objs)
+    while True:
+        batch = list(islice(objs, BATCH_SIZE))
+        if not batch:
+            return
+        model.objects.using(using).bulk_create(batch)
+
+
+def register_sqlite(path):
+    """
+    Подключает файл SQLite под псевдонимом bench и применяет к нему
+    миграции: синтетические данные не попадают в рабочую базу.
+    """
+    default = connections.databases[DEFAULT_DB_ALIAS]
+    base = default if default['ENGINE'] == SQLITE_ENGINE else {
+        'ENGINE': SQLITE_ENGINE}
+    connections.databases[BENCH_ALIAS] = {
+        'ENGINE': SQLITE_ENGINE,
+        'NAME': path,
+        'OPTIONS': dict(base.get('OPTIONS', {})),
+    }
+    call_command('migrate', database=BENCH_ALIAS, verbosity=0,
+                 interactive=False)
+    return BENCH_ALIAS
+
+
+def unregister_sqlite():
+    connections[BENCH_ALIAS].close()
+    del connections[BENCH_ALIAS]
+    del connections.databases[BENCH_ALIAS]
+
+
+def endpoint_querysets(using):
+    title = Title.objects.using(using).order_by('-rating_count').first()
+    genre = Genre.objects.using(using).first()
+    review = Review.objects.using(using).filter(
+        title=title).order_by('-pub_date').first()
+    return {
+        'GET /titles/': Title.objects.using(using).order_by('name')[:5],
+        'GET /titles/?genre=': TitleFilter(
+            {'genre': genre.slug},
+            queryset=Title.objects.using(using).order_by('name')
+        ).qs[:5],
+        'GET /titles/{id}/reviews/': Review.objects.using(using).filter(
+            title_id=title.pk).order_by('-pub_date')[:5],
+        'GET /titles/{id}/reviews/{id}/comments/': (
+            Comment.objects.using(using).filter(
+                review_id=review.pk, review__title_id=title.pk
+            ).order_by('-pub_date')[:5]
+        ),
+    }
+
+
+class Command(BaseCommand):
+    help = "Seed a synthetic catalogue and show query plans for hot endpoints"
+
+    def add_arguments(self, parser):
+        target = parser.add_mutually_exclusive_group()
+        target.add_argument('--sqlite-path',
+                            help='SQLite file to seed and explain, created '
+                                 'and migrated if needed')
+        target.add_argument('--database',
+                            help='Configured database alias to seed and '
+                                 'explain; use a throwaway database')
+        parser.add_argument('--seed', action='store_true',
+                            help='Seed synthetic data before explaining '
+                                 '(skipped if it is already seeded)')
+        parser.add_argument('--titles', type=int, default=100_000)
+        parser.add_argument('--reviews', type=int, default=5_000_000)
+        parser.add_argument('--comments', type=int, default=100_000)
+        parser.add_argument('--repeat', type=int, default=20,
+                            help='Timed executions per endpoint query')
+
+    def handle(self, *args, **options):
+        if options['seed'] and not (options['sqlite_path']
+                                    or options['database']):
+            raise CommandError(
+                '--seed writes millions of rows, pass --sqlite-path with '
+                'a throwaway file or --database with a throwaway alias'
+            )
+        if options['sqlite_path']:
+            using = register_sqlite(options['sqlite_path'])
+            try:
+                self.bench(using, options)
+            finally:
+                unregister_sqlite()
+        else:
+            self.bench(options['database'] or DEFAULT_DB_ALIAS, options)
+
+    def bench(self, using, options):
+        if options['seed']:
+            self.seed(options['titles'], options['reviews'],
+                      options['comments'], using)
+        if not Review.objects.using(using).exists():
+            raise CommandError('No reviews found, run with --seed first')
+
+        for name, queryset in endpoint_querysets(using).items():
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            self.stdout.write(queryset.explain())
+            started = time.perf_counter()
+            for _ in range(options['repeat']):
+                list(queryset.all())
+            elapsed = (time.perf_counter() - started) / options['repeat']
+            self.stdout.write(f'avg {elapsed * 1000:.2f} ms\n')
+
+    def seed(self, titles, reviews, comments, using):
+        """
+        Синтетические строки отмечены префиксом bench- в слагах и именах
+        пользователей; если они уже есть, повторный посев пропускается.
+        """
+        if Category.objects.using(using).filter(
+                slug__startswith=BENCH_PREFIX).exists():
+            self.stdout.write('Synthetic data is already seeded, reusing it')
+            return
+        per_title = max(1, reviews // titles)
+        started = time.perf_counter()
+        with transaction.atomic(using=using):
+            Category.objects.using(using).bulk_create(
+                Category(name=f'Категория {i}',
+                         slug=f'{BENCH_PREFIX}category-{i}')
+                for i in range(10)
+            )
+            Genre.objects.using(using).bulk_create(
+                Genre(name=f'Жанр {i}', slug=f'{BENCH_PREFIX}genre-{i}')
+                for i in range(30)
+            )
+            User.objects.using(using).bulk_create(
+                User(username=f'{BENCH_PREFIX}user-{i}',
+                     email=f'{BENCH_PREFIX}user-{i}@yamdb.fake')
+                for i in range(per_title)
+            )
+            category_ids = list(
+                Category.objects.using(using)
+                .filter(slug__startswith=BENCH_PREFIX)
+                .values_list('id', flat=True)
+            )
+            genre_ids = list(
+                Genre.objects.using(using)
+                .filter(slug__startswith=BENCH_PREFIX)
+                .values_list('id', flat=True)
+            )
+            user_ids = list(
+                User.objects.using(using)
+                .filter(username__startswith=BENCH_PREFIX)
+                .values_list('id', flat=True)
+            )
+            bulk_insert(
+                Title,
+                (Title(name=f'Произведение {i}', year=1900 + i % 120,
+                       description='', category_id=random.choice(category_ids))
+                 for i in range(titles)),
+                using,
+            )
+            title_ids = list(
+                Title.objects.using(using)
+                .filter(category_id__in=category_ids)
+                .values_list('id', flat=True)
+            )
+            bulk_insert(
+                Genre_title,
+                (Genre_title(title_id=title_id, genre_id=genre_id)
+                 for title_id in title_ids
+                 for genre_id in random.sample(genre_ids, 2)),
+                using,
+            )
+            bulk_insert(
+                Review,
+                (Review(title_id=title_id, author_id=author_id,
+                        text='Отзыв', score=random.randint(1, 10))
+                 for title_id in title_ids
+                 for author_id in user_ids),
+                using,
+            )
+            review_ids = list(
+                Review.objects.using(using).order_by()
+                .filter(title__category_id__in=category_ids)
+                .values_list('id', flat=True)[:comments]
+            )
+            bulk_insert(
+                Comment,
+                (Comment(review_id=review_id, author_id=user_ids[0],
+                         text='Комментарий')
+                 for review_id in review_ids),
+                using,
+            )
+        rebuild_ratings(using=using)
+        self.stdout.write(
+            f'Seeded {len(title_ids)} titles, {len(title_ids) * per_title} '
+            f'reviews in {time.perf_counter() - started:.1f} s'
+        )
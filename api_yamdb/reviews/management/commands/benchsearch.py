@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from reviews.models import Title
+from reviews.search import ContainsBackend, SQLiteFTSBackend
+
+
+class Command(BaseCommand):
+    help = "Compare FTS5 search with the LIKE '%x%' contains filter"
+
+    def add_arguments(self, parser):
+        parser.add_argument('queries', nargs='*',
+                            default=['произв', 'отзыв', 'комментарий'])
+        parser.add_argument('--repeat', type=int, default=20,
+                            help='Timed executions per query')
+        parser.add_argument('--limit', type=int, default=10)
+
+    def handle(self, *args, **options):
+        if not Title.objects.exists():
+            raise CommandError(
+                'No titles found, seed data with benchindexes --seed first'
+            )
+        backends = {
+            'fts5': SQLiteFTSBackend(),
+            'contains': ContainsBackend(),
+        }
+        for kind in SQLiteFTSBackend.kinds:
+            for query in options['queries']:
+                self.stdout.write(
+                    self.style.MIGRATE_HEADING(f'{kind}: {query!r}')
+                )
+                for name, backend in backends.items():
+                    started = time.perf_counter()
+                    for _ in range(options['repeat']):
+                        hits = backend.search(kind, query, options['limit'])
+                    elapsed = (
+                        (time.perf_counter() - started) / options['repeat']
+                    )
+                    self.stdout.write(
+                        f'{name:>8}: {len(hits)} hits, '
+                        f'avg {elapsed * 1000:.2f} ms'
+                    )
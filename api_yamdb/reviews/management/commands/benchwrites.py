@@ -0,0 +1,105 @@
+import random
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection, connections
+from reviews.models import Category, Review, Title
+from users.models import User
+
+BENCH_SLUG = 'bench-writes'
+SQLITE_PRAGMAS = ('journal_mode', 'synchronous', 'mmap_size', 'busy_timeout')
+
+
+def write_reviews(author_id, title_ids):
+    errors = Counter()
+    try:
+        for title_id in title_ids:
+            try:
+                Review.objects.create(
+                    title_id=title_id, author_id=author_id,
+                    text='Нагрузочный отзыв', score=random.randint(1, 10)
+                )
+            except DatabaseError as error:
+                errors[type(error).__name__] += 1
+    finally:
+        # У каждого потока своё соединение с базой.
+        connections.close_all()
+    return errors
+
+
+class Command(BaseCommand):
+    help = ('Measure concurrent review-creation throughput on the '
+            'configured database profile')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8,
+                            help='Concurrent writers, one author each')
+        parser.add_argument('--titles', type=int, default=200,
+                            help='Titles every writer reviews')
+        parser.add_argument('--keep', action='store_true',
+                            help='Keep the generated data')
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.MIGRATE_HEADING(self.describe()))
+        workers = options['workers']
+        category, title_ids, author_ids = self.seed(workers,
+                                                    options['titles'])
+        try:
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                errors = sum(
+                    pool.map(write_reviews, author_ids,
+                             [title_ids] * workers),
+                    Counter()
+                )
+            elapsed = time.perf_counter() - started
+            written = Review.objects.filter(title__category=category).count()
+            self.stdout.write(
+                f'{written} reviews in {elapsed:.2f} s: '
+                f'{written / elapsed:.0f} reviews/s, '
+                f'{workers} writers, errors: {dict(errors) or 0}'
+            )
+        finally:
+            if not options['keep']:
+                Title.objects.filter(category=category).delete()
+                User.objects.filter(pk__in=author_ids).delete()
+                category.delete()
+
+    def describe(self):
+        settings_dict = connection.settings_dict
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                pragmas = []
+                for name in SQLITE_PRAGMAS:
+                    cursor.execute(f'PRAGMA {name}')
+                    pragmas.append(f'{name}={cursor.fetchone()[0]}')
+            return 'sqlite: ' + ', '.join(pragmas)
+        options = settings_dict['OPTIONS']
+        return (
+            f"{connection.vendor}: "
+            f"CONN_MAX_AGE={settings_dict['CONN_MAX_AGE']}, "
+            f"pool_size={options.get('pool_size', 0)}, "
+            f"health_checks={settings_dict.get('CONN_HEALTH_CHECKS', False)}"
+        )
+
+    def seed(self, workers, titles):
+        category, _ = Category.objects.get_or_create(
+            slug=BENCH_SLUG, defaults={'name': 'Нагрузочный тест'}
+        )
+        Title.objects.bulk_create(
+            Title(name=f'Нагрузка {number}', year=2000, category=category)
+            for number in range(titles)
+        )
+        User.objects.bulk_create(
+            User(username=f'{BENCH_SLUG}-{number}',
+                 email=f'{BENCH_SLUG}-{number}@yamdb.fake')
+            for number in range(workers)
+        )
+        title_ids = list(Title.objects.filter(
+            category=category).values_list('pk', flat=True))
+        author_ids = list(User.objects.filter(
+            username__startswith=f'{BENCH_SLUG}-'
+        ).values_list('pk', flat=True))
+        return category, title_ids, author_ids
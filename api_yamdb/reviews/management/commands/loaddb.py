@@ -1,108 +1,402 @@
 import csv
+import hashlib
 import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack, contextmanager
+from itertools import islice
 
+import django
+from api.signals import CACHE_DEPENDENCIES
+from api.v1.cache import invalidate
 from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.core.management.base import BaseCommand
-from progress.bar import IncrementalBar
-from reviews.models import Category, Comment, Genre, Genre_title, Review, Title
+from django.db import transaction
+from progress.counter import Counter
+from reviews.models import (Category, Comment, Genre, Genre_title,
+                            ImportRowHash, Review, Title)
+from reviews.ratings import rebuild_ratings
+from reviews.versions import touch_reviews, touch_titles
+from users.authentication import principal_cache, remember_principal
 from users.models import User
 
 
-def category_create(row):
-    Category.objects.get_or_create(
-        id=row[0],
-        name=row[1],
-        slug=row[2],
-    )
+def category_fields(row):
+    return {'id': row[0], 'name': row[1], 'slug': row[2]}
 
 
-def genre_create(row):
-    Genre.objects.get_or_create(
-        id=row[0],
-        name=row[1],
-        slug=row[2],
-    )
+def genre_fields(row):
+    return {'id': row[0], 'name': row[1], 'slug': row[2]}
 
 
-def titles_create(row):
-    Title.objects.get_or_create(
-        id=row[0],
-        name=row[1],
-        year=row[2],
-        category_id=row[3],
-    )
+def titles_fields(row):
+    return {'id': row[0], 'name': row[1], 'year': row[2],
+            'category_id': row[3]}
 
 
-def users_create(row):
-    User.objects.get_or_create(
-        id=row[0],
-        username=row[1],
-        email=row[2],
-        role=row[3],
-        bio=row[4],
-        first_name=row[5],
-        last_name=row[6],
-    )
+def users_fields(row):
+    return {
+        'id': row[0],
+        'username': row[1],
+        'email': row[2],
+        'role': row[3],
+        'bio': row[4],
+        'first_name': row[5],
+        'last_name': row[6],
+    }
 
 
-def review_create(row):
-    title, _ = Title.objects.get_or_create(id=row[1])
-    Review.objects.get_or_create(
-        id=row[0],
-        title=title,
-        text=row[2],
-        author_id=row[3],
-        score=row[4],
-        pub_date=row[5]
-    )
+def review_fields(row):
+    return {'id': row[0], 'title_id': row[1], 'text': row[2],
+            'author_id': row[3], 'score': row[4], 'pub_date': row[5]}
 
 
-def comment_create(row):
-    review, _ = Review.objects.get_or_create(id=row[1])
-    Comment.objects.get_or_create(
-        id=row[0],
-        review=review,
-        text=row[2],
-        author_id=row[3],
-        pub_date=row[4],
-    )
+def comment_fields(row):
+    return {'id': row[0], 'review_id': row[1], 'text': row[2],
+            'author_id': row[3], 'pub_date': row[4]}
 
 
-def genre_title_create(row):
-    title, _ = Title.objects.get_or_create(id=row[1])
-    genre, _ = Genre.objects.get_or_create(id=row[2])
-    Genre_title.objects.get_or_create(
-        id=row[0],
-        title=title,
-        genre=genre,
-    )
+def genre_title_fields(row):
+    return {'id': row[0], 'title_id': row[1], 'genre_id': row[2]}
 
 
+# Файл: (модель, разбор строки, файлы, которые должны быть записаны раньше)
 action = {
-    'category.csv': category_create,
-    'genre.csv': genre_create,
-    'titles.csv': titles_create,
-    'users.csv': users_create,
-    'review.csv': review_create,
-    'comments.csv': comment_create,
-    'genre_title.csv': genre_title_create
+    'category.csv': (Category, category_fields, ()),
+    'genre.csv': (Genre, genre_fields, ()),
+    'titles.csv': (Title, titles_fields, ('category.csv',)),
+    'users.csv': (User, users_fields, ()),
+    'review.csv': (Review, review_fields, ('titles.csv', 'users.csv')),
+    'comments.csv': (Comment, comment_fields, ('review.csv', 'users.csv')),
+    'genre_title.csv': (
+        Genre_title, genre_title_fields, ('titles.csv', 'genre.csv')
+    ),
+}
+
+
+# Файл: [(функция версий, lookup, поле строки)] — что обновить, когда
+# строки файла записаны. bulk_create и bulk_update не вызывают сигналы,
+# поэтому версии, даты изменения и кэш API обновляются командой.
+touches = {
+    'category.csv': [(touch_titles, 'category_id__in', 'id')],
+    'genre.csv': [(touch_titles, 'genre__in', 'id')],
+    'titles.csv': [(touch_titles, 'pk__in', 'id')],
+    'review.csv': [
+        (touch_titles, 'pk__in', 'title_id'),
+        (touch_reviews, 'pk__in', 'id'),
+    ],
+    'comments.csv': [(touch_reviews, 'pk__in', 'review_id')],
+    'genre_title.csv': [(touch_titles, 'pk__in', 'title_id')],
 }
 
 
+def read_chunks(path, batch_size):
+    """Читает CSV один раз и отдаёт строки пачками (номер строки, row)."""
+    with open(path, 'r', encoding='utf-8', newline='') as file:
+        reader = csv.reader(file)
+        next(reader)
+        rows = ((reader.line_num, row) for row in reader)
+        while True:
+            chunk = list(islice(rows, batch_size))
+            if not chunk:
+                return
+            yield chunk
+
+
+def row_digest(row):
+    return hashlib.blake2b(
+        '\x1f'.join(row).encode('utf-8'), digest_size=16
+    ).hexdigest()
+
+
+def validate_chunk(model, fields, chunk):
+    """
+    Валидирует пачку без запросов к БД: связи проставляются по id,
+    проверка внешних ключей остаётся базе. Возвращает пары
+    (очищенные значения полей, хеш исходной строки) и ошибки в виде,
+    пригодном для передачи между процессами.
+    """
+    rows, errors = [], []
+    for line, row in chunk:
+        try:
+            values = fields(row)
+            obj = model(**values)
+            obj.clean_fields(exclude=[
+                field.name for field in model._meta.fields
+                if field.is_relation or field.attname not in values
+            ])
+        except (IndexError, ValidationError) as error:
+            errors.append((line, str(error)))
+            continue
+        rows.append((
+            {name: getattr(obj, name) for name in values},
+            row_digest(row),
+        ))
+    return rows, errors
+
+
+def validate_rows(filename, chunk):
+    """Валидирует пачку строк файла (выполняется и в пуле процессов)."""
+    model, fields, _ = action[filename]
+    return validate_chunk(model, fields, chunk)
+
+
+def iter_parsed(filename, path, batch_size, pool=None, window=1):
+    """
+    Отдаёт валидированные пачки файла по порядку. С пулом процессов
+    пачки валидируются параллельно, пока основной процесс пишет
+    предыдущие; в работе не больше window пачек, поэтому память
+    ограничена размером пачки, а не файла.
+    """
+    chunks = read_chunks(path, batch_size)
+    if pool is None:
+        for chunk in chunks:
+            yield validate_rows(filename, chunk)
+        return
+    pending = deque()
+    for chunk in chunks:
+        pending.append(pool.submit(validate_rows, filename, chunk))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def dependency_order():
+    """Файлы в порядке записи: каждый после файлов, от которых зависит."""
+    written = []
+    while len(written) < len(action):
+        for filename, (_, _, depends_on) in action.items():
+            if filename not in written and set(depends_on).issubset(written):
+                written.append(filename)
+    return written
+
+
+def touch_written(filename, written):
+    """
+    Обновляет версии и даты изменения объектов, представление которых
+    зависит от записанных строк (written — значения их полей).
+    """
+    for touch, lookup, field in touches.get(filename, ()):
+        keys = {values[field] for values in written} - {None}
+        if keys:
+            touch(**{lookup: keys})
+
+
+def remember_principals(user_ids):
+    """Роли изменённых импортом пользователей — в кэш аутентификации."""
+    for user in User.objects.filter(pk__in=user_ids):
+        principal_cache.discard(user.pk)
+        remember_principal(user)
+
+
+def same_values(model, values, current):
+    return all(
+        model._meta.get_field(name).to_python(value) == current[name]
+        for name, value in values.items()
+    )
+
+
+@contextmanager
+def imported_dates():
+    """
+    Отключает auto_now_add у моделей импорта, чтобы bulk_create записал
+    даты публикации из CSV, а не время загрузки.
+    """
+    fields = [
+        field for model, _, _ in action.values()
+        for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now_add', False)
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
 class Command(BaseCommand):
     help = "Load test DB from dir (../static/data/)"
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default=os.path.join(settings.BASE_DIR, 'static/data/'),
+            help='Directory with CSV files',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows validated and written per bulk insert',
+        )
+        parser.add_argument(
+            '--upsert',
+            action='store_true',
+            help='Update rows whose CSV content changed since the last '
+                 'upsert, insert new ones and skip unchanged ones',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Processes validating CSV batches in parallel '
+                 '(1 validates them in the main process)',
+        )
+
     def handle(self, *args, **options):
-        for filename, row in action.items():
-            path = os.path.join(settings.BASE_DIR, "static/data/") + filename
-            with open(path, 'r', encoding='utf-8') as file:
-                row_count = sum(1 for row in file)
-            with open(path, 'r', encoding='utf-8') as file:
-                reader = csv.reader(file)
-                bar = IncrementalBar(filename.ljust(17), max=row_count)
-                next(reader)
-                for row in reader:
-                    bar.next()
-                    action[filename](row)
-                bar.finish()
+        batch_size = options['batch_size']
+        write = self.upsert_file if options['upsert'] else self.write_file
+        workers = options['workers']
+        # Произведения, отзывы которых записаны: bulk-запись не вызывает
+        # сигналы, поэтому их агрегаты пересчитываются после загрузки.
+        self.rated_titles = set()
+        with imported_dates(), ExitStack() as stack:
+            pool = None
+            if workers > 1:
+                pool = stack.enter_context(ProcessPoolExecutor(
+                    max_workers=workers, initializer=django.setup
+                ))
+            for filename in dependency_order():
+                path = os.path.join(options['path'], filename)
+                write(filename, iter_parsed(filename, path, batch_size,
+                                            pool, window=2 * workers))
+        if self.rated_titles:
+            rebuild_ratings(title_ids=self.rated_titles)
         self.stdout.write("!!!The database has been loaded successfully!!!")
+
+    def write_file(self, filename, chunks):
+        """
+        Вставляет строки, пропуская уже существующие. bulk_create с
+        ignore_conflicts не сообщает, сколько строк вставлено, поэтому
+        число вставленных — разница числа строк таблицы до и после.
+        """
+        model = action[filename][0]
+        started = time.perf_counter()
+        read = 0
+        counter = self.progress(filename)
+        with transaction.atomic():
+            before = model.objects.count()
+            for rows, errors in chunks:
+                self.report_errors(filename, errors)
+                existing = set(model.objects.filter(
+                    pk__in=[values['id'] for values, _ in rows]
+                ).values_list('pk', flat=True))
+                model.objects.bulk_create(
+                    [model(**values) for values, _ in rows],
+                    ignore_conflicts=True
+                )
+                self.after_write(filename, [
+                    values for values, _ in rows
+                    if values['id'] not in existing
+                ])
+                read += len(rows)
+                counter.next(len(rows) + len(errors))
+            loaded = model.objects.count() - before
+        counter.finish()
+        if loaded:
+            invalidate(*CACHE_DEPENDENCIES.get(model, ()))
+        self.report_speed(
+            filename, read, started,
+            f'{loaded} inserted, {read - loaded} already present'
+        )
+
+    def upsert_file(self, filename, chunks):
+        """
+        Пишет только изменившиеся строки: хеш каждой строки CSV
+        сравнивается с сохранённым при прошлом импорте. Для строк без
+        хеша (загруженных без --upsert) сравниваются значения полей.
+        """
+        model = action[filename][0]
+        started = time.perf_counter()
+        inserted = updated = skipped = 0
+        counter = self.progress(filename)
+        with transaction.atomic():
+            for rows, errors in chunks:
+                self.report_errors(filename, errors)
+                stored = dict(
+                    ImportRowHash.objects.filter(
+                        source=filename,
+                        object_id__in=[values['id'] for values, _ in rows]
+                    ).values_list('object_id', 'digest')
+                )
+                candidates = [
+                    (values, digest) for values, digest in rows
+                    if stored.get(values['id']) != digest
+                ]
+                current = {
+                    row['id']: row for row in model.objects.filter(
+                        pk__in=[values['id'] for values, _ in candidates]
+                    ).values(*rows[0][0])
+                } if candidates else {}
+                new, changed, digests, written = [], [], {}, []
+                for values, digest in candidates:
+                    digests[values['id']] = digest
+                    previous = current.get(values['id'])
+                    if previous is None:
+                        new.append(model(**values))
+                    elif (values['id'] in stored
+                          or not same_values(model, values, previous)):
+                        changed.append(model(**values))
+                        written.append(previous)
+                    else:
+                        continue
+                    written.append(values)
+                model.objects.bulk_create(new)
+                if changed:
+                    model.objects.bulk_update(changed, [
+                        name for name in rows[0][0] if name != 'id'
+                    ])
+                self.after_write(filename, written)
+                if model is User and changed:
+                    transaction.on_commit(lambda ids=[
+                        user.pk for user in changed
+                    ]: remember_principals(ids))
+                ImportRowHash.objects.filter(
+                    source=filename, object_id__in=digests
+                ).delete()
+                ImportRowHash.objects.bulk_create(
+                    ImportRowHash(source=filename, object_id=pk,
+                                  digest=digest)
+                    for pk, digest in digests.items()
+                )
+                inserted += len(new)
+                updated += len(changed)
+                skipped += len(rows) - len(new) - len(changed)
+                counter.next(len(rows) + len(errors))
+        counter.finish()
+        if inserted or updated:
+            invalidate(*CACHE_DEPENDENCIES.get(model, ()))
+        self.report_speed(
+            filename, inserted + updated + skipped, started,
+            f'{inserted} inserted, {updated} updated, {skipped} skipped'
+        )
+
+    def after_write(self, filename, written):
+        touch_written(filename, written)
+        if action[filename][0] is Review:
+            # Значения из CSV — строки, из базы (прежние) — числа.
+            title = Review._meta.get_field('title')
+            self.rated_titles.update(
+                title.to_python(values['title_id']) for values in written
+            )
+
+    def progress(self, filename):
+        # progress запоминает sys.stderr при импорте, а не при выводе.
+        return Counter(filename.ljust(17), file=sys.stderr)
+
+    def report_errors(self, filename, errors):
+        for line, error in errors:
+            self.stderr.write(f'{filename}:{line}: {error}')
+
+    def report_speed(self, filename, rows, started, summary):
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'{filename}: {summary} in {elapsed:.2f} s '
+            f'({rows / elapsed if elapsed else rows:.0f} rows/s)'
+        )
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+from reviews.ratings import rebuild_ratings
+
+
+class Command(BaseCommand):
+    help = "Rebuild stored title ratings and score histograms, report drift"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only report drift, do not fix it (exit code 1 on drift)',
+        )
+
+    def handle(self, *args, **options):
+        drift = rebuild_ratings(fix=not options['check'])
+        for title_id, stored, actual in drift:
+            self.stdout.write(
+                f'title {title_id}: stored sum/count {stored[0]}/{stored[1]}'
+                f' histogram {list(stored[2].values())}, actual '
+                f'{actual[0]}/{actual[1]} {list(actual[2].values())}'
+            )
+        if drift and options['check']:
+            raise CommandError(f'Rating drift found for {len(drift)} titles')
+        self.stdout.write(
+            f'Ratings checked, drifted titles: {len(drift)}'
+            + ('' if options['check'] else ' (fixed)')
+        )
@@ -0,0 +1,42 @@
+import time
+
+from api.v1.cache import api_cache
+from django.conf import settings
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+from reviews.rankings import refresh_rankings
+
+
+class Command(BaseCommand):
+    help = ('Refresh ranking tables for titles changed since the last run '
+            '(or all titles with --full)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true',
+                            help='Recompute every title')
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep refreshing every --interval seconds')
+        parser.add_argument('--interval', type=float, default=60,
+                            help='Seconds between refreshes with --loop')
+
+    def handle(self, *args, **options):
+        if isinstance(api_cache(), LocMemCache):
+            self.stderr.write(
+                'API cache is process-local (LocMemCache): web workers '
+                'keep cached rankings for up to '
+                f'{settings.API_CACHE_TIMEOUT} s after a refresh, '
+                'configure a shared CACHE_BACKEND'
+            )
+        full = options['full']
+        while True:
+            started = time.perf_counter()
+            titles, rows, full = refresh_rankings(full=full)
+            self.stdout.write(
+                f'{"Full" if full else "Incremental"} refresh: {titles} '
+                f'titles, {rows} ranking rows in '
+                f'{time.perf_counter() - started:.2f} s'
+            )
+            if not options['loop']:
+                return
+            full = False
+            time.sleep(options['interval'])
@@ -0,0 +1,28 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0005_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportRowHash',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=50, verbose_name='Файл импорта')),
+                ('object_id', models.PositiveIntegerField(verbose_name='Идентификатор записи')),
+                ('digest', models.CharField(max_length=32, verbose_name='Хеш строки')),
+            ],
+            options={
+                'verbose_name': 'Хеш импортированной строки',
+                'verbose_name_plural': 'Хеши импортированных строк',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='importrowhash',
+            constraint=models.UniqueConstraint(fields=('source', 'object_id'), name='unique_import_row'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+from django.db import migrations
+
+
+def create_fts(apps, schema_editor):
+    from reviews.search import install_fts
+    install_fts(schema_editor.connection)
+
+
+def drop_fts(apps, schema_editor):
+    from reviews.search import uninstall_fts
+    uninstall_fts(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0008_scorehistogram'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts, drop_fts),
+    ]
@@ -1,6 +1,6 @@
 from django.contrib.auth import get_user_model
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 
 User = get_user_model()
@@ -60,15 +60,93 @@ class Title(models.Model):
         related_name='titles',
         verbose_name='Категория'
     )
+    rating_sum = models.PositiveIntegerField('Сумма оценок', default=0)
+    rating_count = models.PositiveIntegerField(
+        'Количество оценок',
+        default=0
+    )
+    version = models.PositiveIntegerField(
+        'Версия',
+        default=0,
+        help_text='Растёт при изменении произведения, его жанров '
+                  'или отзывов'
+    )
+    modified = models.DateTimeField('Дата изменения', auto_now=True)
 
     class Meta:
         ordering = ['name']
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
+        indexes = [
+            models.Index(fields=['name'], name='title_name_idx'),
+            models.Index(fields=['modified'], name='title_modified_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
+    @property
+    def rating(self):
+        """Средняя оценка по хранимым агрегатам, без запроса к отзывам."""
+        if not self.rating_count:
+            return None
+        return self.rating_sum // self.rating_count
+
+
+class ScoreHistogram(models.Model):
+    """Распределение оценок произведения, обновляется при записи отзывов."""
+    SCORES = range(1, 11)
+
+    title = models.OneToOneField(
+        Title,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='score_histogram',
+        verbose_name='Произведение'
+    )
+    score_1 = models.PositiveIntegerField('Оценок 1', default=0)
+    score_2 = models.PositiveIntegerField('Оценок 2', default=0)
+    score_3 = models.PositiveIntegerField('Оценок 3', default=0)
+    score_4 = models.PositiveIntegerField('Оценок 4', default=0)
+    score_5 = models.PositiveIntegerField('Оценок 5', default=0)
+    score_6 = models.PositiveIntegerField('Оценок 6', default=0)
+    score_7 = models.PositiveIntegerField('Оценок 7', default=0)
+    score_8 = models.PositiveIntegerField('Оценок 8', default=0)
+    score_9 = models.PositiveIntegerField('Оценок 9', default=0)
+    score_10 = models.PositiveIntegerField('Оценок 10', default=0)
+
+    class Meta:
+        verbose_name = 'Распределение оценок'
+        verbose_name_plural = 'Распределения оценок'
+
+    def __str__(self):
+        return str(self.title_id)
+
+    @staticmethod
+    def field_name(score):
+        return f'score_{score}'
+
+    def counts(self):
+        return {
+            score: getattr(self, self.field_name(score))
+            for score in self.SCORES
+        }
+
+    def median(self):
+        counts = self.counts()
+        total = sum(counts.values())
+        if not total:
+            return None
+        positions = ((total - 1) // 2, total // 2)
+        values = []
+        seen = 0
+        for score, count in counts.items():
+            for position in positions:
+                if seen <= position < seen + count:
+                    values.append(score)
+            seen += count
+        return sum(values) / 2
+
 
 class Genre_title(models.Model):
     title = models.ForeignKey(
@@ -91,6 +169,12 @@ class Genre_title(models.Model):
     class Meta:
         verbose_name = 'Жанр произведения'
         verbose_name_plural = 'Жанры произведения'
+        indexes = [
+            models.Index(
+                fields=['genre', 'title'],
+                name='genre_title_genre_idx'
+            ),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=['title', 'genre'],
@@ -121,11 +205,23 @@ class Review(models.Model):
         validators=[MinValueValidator(1), MaxValueValidator(10)]
     )
     pub_date = models.DateTimeField('Дата публикации', auto_now_add=True)
+    version = models.PositiveIntegerField(
+        'Версия',
+        default=0,
+        help_text='Растёт при изменении отзыва или его комментариев'
+    )
+    modified = models.DateTimeField('Дата изменения', auto_now=True)
 
     class Meta:
         ordering = ['-pub_date']
         verbose_name = 'Отзыв'
         verbose_name_plural = 'Отзывы'
+        indexes = [
+            models.Index(
+                fields=['title', 'pub_date', 'id'],
+                name='review_title_pub_date_idx'
+            ),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=['title', 'author'],
@@ -136,6 +232,26 @@ class Review(models.Model):
     def __str__(self):
         return (self.text)[:15]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Запоминаем произведение и оценку из БД, чтобы при сохранении
+        # сдвинуть рейтинг на разницу, а не пересчитывать его по отзывам.
+        # Если одно из полей отложено, их прочитает сигнал pre_save.
+        if {'title_id', 'score'}.issubset(instance.__dict__):
+            instance._loaded_rating = (
+                instance.__dict__['title_id'], instance.__dict__['score']
+            )
+        return instance
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get('using')):
+            return super().delete(*args, **kwargs)
+
 
 class Comment(models.Model):
     review = models.ForeignKey(
@@ -157,6 +273,100 @@ class Comment(models.Model):
         ordering = ['-pub_date']
         verbose_name = 'Комментрий'
         verbose_name_plural = 'Комментарии'
+        indexes = [
+            models.Index(
+                fields=['review', 'pub_date', 'id'],
+                name='comment_review_pub_date_idx'
+            ),
+        ]
 
     def __str__(self):
         return (self.text)[:15]
+
+
+class ImportRowHash(models.Model):
+    source = models.CharField('Файл импорта', max_length=50)
+    object_id = models.PositiveIntegerField('Идентификатор записи')
+    digest = models.CharField('Хеш строки', max_length=32)
+
+    class Meta:
+        verbose_name = 'Хеш импортированной строки'
+        verbose_name_plural = 'Хеши импортированных строк'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['source', 'object_id'],
+                name='unique_import_row'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.source}:{self.object_id}'
+
+
+class TitleRanking(models.Model):
+    """
+    Строка рейтинга произведения в одной области: во всём каталоге
+    (all), в жанре (genre:<id>) или в категории (category:<id>).
+    Таблица пересчитывается командой refreshrankings, страница рейтинга
+    читается по индексу области без сортировки каталога.
+    """
+    GLOBAL_SCOPE = 'all'
+
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='rankings',
+        verbose_name='Произведение'
+    )
+    scope = models.CharField('Область', max_length=50)
+    score = models.FloatField(
+        'Взвешенная оценка',
+        help_text='Средняя оценка, сглаженная к средней по каталогу'
+    )
+    review_count = models.PositiveIntegerField('Количество отзывов')
+    trending = models.FloatField(
+        'Активность',
+        null=True,
+        help_text='log2 суммы весов недавних отзывов, вес отзыва '
+                  'вдвое меньше за каждый период полураспада'
+    )
+
+    class Meta:
+        verbose_name = 'Рейтинг произведения'
+        verbose_name_plural = 'Рейтинги произведений'
+        indexes = [
+            models.Index(
+                fields=['scope', '-score', 'title'],
+                name='ranking_score_idx'
+            ),
+            models.Index(
+                fields=['scope', '-review_count', 'title'],
+                name='ranking_reviews_idx'
+            ),
+            models.Index(
+                fields=['scope', '-trending', 'title'],
+                name='ranking_trending_idx'
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['title', 'scope'],
+                name='unique_title_ranking'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.scope}: {self.title_id}'
+
+
+class RankingState(models.Model):
+    """Состояние пересчёта рейтингов, единственная строка."""
+    refreshed_at = models.DateTimeField('Пересчитано', null=True)
+    prior = models.FloatField('Средняя оценка каталога', default=0)
+
+    class Meta:
+        verbose_name = 'Состояние рейтингов'
+        verbose_name_plural = 'Состояние рейтингов'
+
+    def __str__(self):
+        return str(self.refreshed_at)
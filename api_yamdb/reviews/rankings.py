@@ -0,0 +1,135 @@
+import math
+from datetime import datetime, timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from .models import Genre_title, RankingState, Review, Title, TitleRanking
+
+CHUNK_SIZE = 500
+# Активность хранится как log2 суммы 2 ** ((дата отзыва - эпоха) /
+# период полураспада): порядок произведений от времени не зависит,
+# и строки, где отзывов не прибавилось, не нужно пересчитывать.
+TRENDING_EPOCH = datetime(2020, 1, 1, tzinfo=timezone.utc)
+# Отзывы старше стольких периодов полураспада весят меньше 2 ** -16
+# и в активности не учитываются.
+TRENDING_HALF_LIVES = 16
+
+
+def half_life():
+    return timedelta(hours=settings.RANKING_TRENDING_HALF_LIFE)
+
+
+def trending_exponent(moment):
+    return (moment - TRENDING_EPOCH) / half_life()
+
+
+def activity(trending, now=None):
+    """Сумма весов отзывов на момент now: сколько «свежих» отзывов."""
+    if trending is None:
+        return 0
+    return 2 ** (trending - trending_exponent(now or timezone.now()))
+
+
+def log2_sum(exponents):
+    top = max(exponents)
+    return top + math.log2(sum(2 ** (value - top) for value in exponents))
+
+
+def bayesian(rating_sum, rating_count, prior):
+    """
+    Средняя оценка, к которой добавлено RANKING_PRIOR_WEIGHT оценок,
+    равных средней по каталогу: у произведений с парой отзывов
+    рейтинг близок к среднему, с сотнями — к собственному.
+    """
+    weight = settings.RANKING_PRIOR_WEIGHT
+    return (rating_sum + prior * weight) / (rating_count + weight)
+
+
+def catalogue_prior():
+    totals = Title.objects.aggregate(
+        rating_sum=Sum('rating_sum'), rating_count=Sum('rating_count')
+    )
+    if not totals['rating_count']:
+        return 0
+    return totals['rating_sum'] / totals['rating_count']
+
+
+def rank_titles(title_ids, prior, now):
+    """Пересобирает строки рейтингов произведений title_ids."""
+    genres = {}
+    for title_id, genre_id in Genre_title.objects.filter(
+            title_id__in=title_ids, genre__isnull=False
+    ).values_list('title_id', 'genre_id'):
+        genres.setdefault(title_id, []).append(genre_id)
+    exponents = {}
+    for title_id, pub_date in Review.objects.filter(
+            title_id__in=title_ids,
+            pub_date__gte=now - half_life() * TRENDING_HALF_LIVES,
+    ).values_list('title_id', 'pub_date'):
+        exponents.setdefault(title_id, []).append(
+            trending_exponent(pub_date)
+        )
+    rankings = []
+    for title_id, rating_sum, rating_count, category_id in (
+            Title.objects.filter(pk__in=title_ids, rating_count__gt=0)
+            .values_list('pk', 'rating_sum', 'rating_count', 'category_id')
+    ):
+        scopes = [TitleRanking.GLOBAL_SCOPE]
+        scopes.extend(f'genre:{pk}' for pk in genres.get(title_id, ()))
+        if category_id is not None:
+            scopes.append(f'category:{category_id}')
+        score = bayesian(rating_sum, rating_count, prior)
+        trending = (
+            log2_sum(exponents[title_id]) if title_id in exponents else None
+        )
+        rankings.extend(
+            TitleRanking(title_id=title_id, scope=scope, score=score,
+                         review_count=rating_count, trending=trending)
+            for scope in scopes
+        )
+    with transaction.atomic():
+        TitleRanking.objects.filter(title_id__in=title_ids).delete()
+        TitleRanking.objects.bulk_create(rankings)
+    return len(rankings)
+
+
+def refresh_rankings(full=False):
+    """
+    Пересчитывает рейтинги произведений, изменившихся с прошлого
+    запуска: отзывы, жанры и категория меняют Title.modified, в том
+    числе при загрузке командой loaddb.
+    Все произведения пересчитываются при первом запуске, по full
+    и когда средняя оценка каталога сдвинулась больше чем на
+    RANKING_PRIOR_TOLERANCE. Возвращает (произведений, строк, full).
+    """
+    now = timezone.now()
+    state, _ = RankingState.objects.get_or_create(pk=1)
+    prior = catalogue_prior()
+    full = (
+        full or state.refreshed_at is None
+        or abs(prior - state.prior) > settings.RANKING_PRIOR_TOLERANCE
+    )
+    titles = Title.objects.order_by('pk')
+    if not full:
+        # Перекрытие ловит записи, закоммиченные после прошлого запуска
+        # с более ранним временем изменения.
+        titles = titles.filter(
+            modified__gte=state.refreshed_at - timedelta(
+                seconds=settings.RANKING_REFRESH_OVERLAP)
+        )
+    title_ids = iter(list(titles.values_list('pk', flat=True)))
+    refreshed = rows = 0
+    while True:
+        chunk = list(islice(title_ids, CHUNK_SIZE))
+        if not chunk:
+            break
+        rows += rank_titles(chunk, prior, now)
+        refreshed += len(chunk)
+    state.refreshed_at = now
+    state.prior = prior
+    state.save()
+    return refreshed, rows, full
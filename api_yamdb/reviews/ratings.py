@@ -0,0 +1,101 @@
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .models import Review, ScoreHistogram, Title
+
+
+def apply_review_change(title_id, removed=None, added=None):
+    """
+    Инкрементально переносит оценку отзыва в хранимые агрегаты
+    произведения: removed — убранная оценка, added — добавленная.
+    Версия произведения растёт при любом изменении отзывов, так как
+    меняются ответы с отзывами этого произведения.
+    """
+    Title.objects.filter(pk=title_id).update(
+        rating_sum=F('rating_sum') + (added or 0) - (removed or 0),
+        rating_count=(
+            F('rating_count')
+            + int(added is not None) - int(removed is not None)
+        ),
+        version=F('version') + 1,
+        modified=timezone.now(),
+    )
+    if removed == added:
+        return
+    changes = {}
+    if removed is not None:
+        name = ScoreHistogram.field_name(removed)
+        changes[name] = F(name) - 1
+    if added is not None:
+        name = ScoreHistogram.field_name(added)
+        changes[name] = F(name) + 1
+    histogram = ScoreHistogram.objects.filter(title_id=title_id)
+    if not histogram.update(**changes) and added is not None:
+        ScoreHistogram.objects.get_or_create(title_id=title_id)
+        histogram.update(**changes)
+
+
+def collect_ratings(using=DEFAULT_DB_ALIAS, title_ids=None):
+    """
+    Считает агрегаты заново по таблице отзывов:
+    {id произведения: {оценка: количество отзывов}}.
+    title_ids ограничивает подсчёт указанными произведениями.
+    """
+    histograms = {}
+    reviews = Review.objects.using(using).order_by()
+    if title_ids is not None:
+        reviews = reviews.filter(title__in=title_ids)
+    rows = reviews.values('title', 'score').annotate(count=Count('id'))
+    for row in rows:
+        histograms.setdefault(row['title'], {})[row['score']] = row['count']
+    return histograms
+
+
+def rebuild_ratings(fix=True, using=DEFAULT_DB_ALIAS, title_ids=None):
+    """
+    Сверяет хранимые агрегаты с отзывами и возвращает список
+    расхождений (id, хранимое значение, фактическое значение), где
+    значение — (сумма оценок, число оценок, распределение оценок).
+    При fix=True расхождения исправляются. title_ids ограничивает
+    сверку указанными произведениями, по умолчанию сверяются все.
+    """
+    actual = collect_ratings(using, title_ids)
+    drift = []
+    with transaction.atomic(using=using):
+        titles = Title.objects.using(using).select_related('score_histogram')
+        if title_ids is not None:
+            titles = titles.filter(pk__in=title_ids)
+        if fix:
+            titles = titles.select_for_update(of=('self',))
+        for title in titles:
+            counts = dict.fromkeys(ScoreHistogram.SCORES, 0)
+            counts.update(actual.get(title.pk, {}))
+            expected = (
+                sum(score * count for score, count in counts.items()),
+                sum(counts.values()),
+                counts,
+            )
+            histogram = getattr(title, 'score_histogram', None)
+            stored = (
+                title.rating_sum,
+                title.rating_count,
+                histogram.counts() if histogram else dict.fromkeys(
+                    ScoreHistogram.SCORES, 0),
+            )
+            if stored == expected:
+                continue
+            drift.append((title.pk, stored, expected))
+            if fix:
+                Title.objects.using(using).filter(pk=title.pk).update(
+                    rating_sum=expected[0],
+                    rating_count=expected[1],
+                )
+                ScoreHistogram.objects.using(using).update_or_create(
+                    title_id=title.pk,
+                    defaults={
+                        ScoreHistogram.field_name(score): count
+                        for score, count in counts.items()
+                    },
+                )
+    return drift
@@ -0,0 +1,227 @@
+import html
+import re
+from collections import namedtuple
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils.module_loading import import_string
+
+from .models import Comment, Review, Title
+
+SearchHit = namedtuple(
+    'SearchHit', ('id', 'title_id', 'review_id', 'snippet', 'rank')
+)
+
+# Таблица модели: индексируемые колонки. Индексы FTS5 с внешним
+# содержимым: текст хранится только в таблицах моделей.
+FTS_TABLES = {
+    'reviews_title': ('name', 'description'),
+    'reviews_review': ('text',),
+    'reviews_comment': ('text',),
+}
+FTS_TRIGGERS = ('ai', 'ad', 'au')
+HIGHLIGHT = ('<mark>', '</mark>')
+# Совпадения сначала отмечаются управляющими символами: текст фрагмента
+# экранируется, и только потом метки заменяются на HIGHLIGHT.
+MARKERS = ('\x02', '\x03')
+SNIPPET_TOKENS = 12
+
+
+def highlight(snippet):
+    """HTML фрагмента: текст экранирован, размечены только совпадения."""
+    escaped = html.escape(snippet)
+    for marker, tag in zip(MARKERS, HIGHLIGHT):
+        escaped = escaped.replace(marker, tag)
+    return escaped
+
+
+def fts_statements(table, columns):
+    fts = f'{table}_fts'
+    names = ', '.join(columns)
+    new = ', '.join(f'new.{column}' for column in columns)
+    old = ', '.join(f'old.{column}' for column in columns)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({names}, "
+        f"content='{table}', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} "
+        f"BEGIN INSERT INTO {fts}(rowid, {names}) "
+        f"VALUES (new.id, {new}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} "
+        f"BEGIN INSERT INTO {fts}({fts}, rowid, {names}) "
+        f"VALUES ('delete', old.id, {old}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au "
+        f"AFTER UPDATE OF {names} ON {table} "
+        f"BEGIN INSERT INTO {fts}({fts}, rowid, {names}) "
+        f"VALUES ('delete', old.id, {old}); "
+        f"INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new}); END",
+    ]
+
+
+def install_fts(db):
+    """
+    Создаёт индексы и триггеры FTS5, которых не хватает. SQLite
+    пересоздаёт таблицу при изменении схемы и теряет её триггеры,
+    поэтому установка повторяется после каждой миграции; индекс,
+    оставшийся без триггеров, перестраивается заново.
+    """
+    if db.vendor != 'sqlite':
+        return
+    with db.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='trigger'")
+        triggers = {row[0] for row in cursor.fetchall()}
+        for table, columns in FTS_TABLES.items():
+            fts = f'{table}_fts'
+            stale = any(
+                f'{fts}_{suffix}' not in triggers for suffix in FTS_TRIGGERS
+            )
+            for sql in fts_statements(table, columns):
+                cursor.execute(sql)
+            if stale:
+                cursor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def uninstall_fts(db):
+    if db.vendor != 'sqlite':
+        return
+    with db.cursor() as cursor:
+        for table in FTS_TABLES:
+            fts = f'{table}_fts'
+            for suffix in FTS_TRIGGERS:
+                cursor.execute(f'DROP TRIGGER IF EXISTS {fts}_{suffix}')
+            cursor.execute(f'DROP TABLE IF EXISTS {fts}')
+
+
+def query_terms(query):
+    return re.findall(r'\w+', query.lower())
+
+
+class SearchBackend:
+    """
+    Полнотекстовый поиск по произведениям, отзывам и комментариям.
+    search() возвращает SearchHit в порядке релевантности; title_id и
+    review_id — родительские объекты, нужные для построения ссылок.
+    """
+    kinds = ('titles', 'reviews', 'comments')
+
+    def search(self, kind, query, limit, offset=0):
+        raise NotImplementedError
+
+
+class SQLiteFTSBackend(SearchBackend):
+    """Поиск по индексам SQLite FTS5 с ранжированием bm25."""
+    sql = {
+        'titles': (
+            'SELECT {fts}.rowid, NULL, NULL, {snippet}, bm25({fts}) '
+            'FROM {fts} WHERE {fts} MATCH %s '
+        ),
+        'reviews': (
+            'SELECT {fts}.rowid, r.title_id, NULL, {snippet}, bm25({fts}) '
+            'FROM {fts} JOIN reviews_review r ON r.id = {fts}.rowid '
+            'WHERE {fts} MATCH %s '
+        ),
+        'comments': (
+            'SELECT {fts}.rowid, r.title_id, c.review_id, {snippet}, '
+            'bm25({fts}) FROM {fts} '
+            'JOIN reviews_comment c ON c.id = {fts}.rowid '
+            'JOIN reviews_review r ON r.id = c.review_id '
+            'WHERE {fts} MATCH %s '
+        ),
+    }
+    tables = {
+        'titles': 'reviews_title_fts',
+        'reviews': 'reviews_review_fts',
+        'comments': 'reviews_comment_fts',
+    }
+
+    @staticmethod
+    def match_expression(query):
+        # Каждое слово — префиксный поиск, слова объединяются через AND;
+        # кавычки исключают операторы FTS5 из пользовательского ввода.
+        return ' '.join(f'"{term}"*' for term in query_terms(query))
+
+    def search(self, kind, query, limit, offset=0):
+        match = self.match_expression(query)
+        if not match:
+            return []
+        # Столбцы MATCH и функции ранжирования FTS5 ссылаются на таблицу
+        # по имени: псевдонимы таблиц здесь не поддерживаются.
+        fts = self.tables[kind]
+        snippet = f"snippet({fts}, -1, %s, %s, '…', %s)"
+        sql = self.sql[kind].format(fts=fts, snippet=snippet) + (
+            f'ORDER BY bm25({fts}) LIMIT %s OFFSET %s'
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [*MARKERS, SNIPPET_TOKENS, match,
+                                 limit, offset])
+            return [
+                SearchHit(pk, title_id, review_id, highlight(snippet), rank)
+                for pk, title_id, review_id, snippet, rank
+                in cursor.fetchall()
+            ]
+
+
+class ContainsBackend(SearchBackend):
+    """
+    Запасной вариант для баз без FTS: LIKE по всем словам запроса,
+    без ранжирования.
+    """
+    fields = {
+        'titles': (Title, ('name', 'description')),
+        'reviews': (Review, ('text',)),
+        'comments': (Comment, ('text',)),
+    }
+
+    def search(self, kind, query, limit, offset=0):
+        terms = query_terms(query)
+        if not terms:
+            return []
+        model, fields = self.fields[kind]
+        queryset = model.objects.order_by('-pk')
+        for term in terms:
+            condition = Q()
+            for field in fields:
+                condition |= Q(**{f'{field}__icontains': term})
+            queryset = queryset.filter(condition)
+        if kind == 'comments':
+            queryset = queryset.select_related('review')
+        return [
+            SearchHit(obj.pk, *self.parent_ids(kind, obj),
+                      self.snippet(obj, fields, terms), None)
+            for obj in queryset[offset:offset + limit]
+        ]
+
+    @staticmethod
+    def parent_ids(kind, obj):
+        if kind == 'reviews':
+            return obj.title_id, None
+        if kind == 'comments':
+            return obj.review.title_id, obj.review_id
+        return None, None
+
+    @staticmethod
+    def snippet(obj, fields, terms, width=80):
+        text = ' '.join(getattr(obj, field) for field in fields)
+        pattern = re.compile(
+            '|'.join(re.escape(term) for term in terms), re.IGNORECASE
+        )
+        found = pattern.search(text)
+        start = max(0, found.start() - width // 2) if found else 0
+        fragment = text[start:start + width]
+        return highlight(
+            ('…' if start else '')
+            + pattern.sub(
+                lambda match: f'{MARKERS[0]}{match.group()}{MARKERS[1]}',
+                fragment
+            )
+            + ('…' if start + width < len(text) else '')
+        )
+
+
+def get_backend():
+    if settings.SEARCH_BACKEND:
+        return import_string(settings.SEARCH_BACKEND)()
+    if connection.vendor == 'sqlite':
+        return SQLiteFTSBackend()
+    return ContainsBackend()
@@ -0,0 +1,118 @@
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete, pre_save)
+from django.dispatch import receiver
+from users.models import User
+
+from .models import Category, Comment, Genre, Genre_title, Review, Title
+from .ratings import apply_review_change
+from .versions import touch_review, touch_reviews, touch_titles
+
+
+@receiver(pre_save, sender=Review)
+def remember_review_rating(sender, instance, raw, **kwargs):
+    if raw or instance.pk is None or hasattr(instance, '_loaded_rating'):
+        return
+    instance._loaded_rating = (
+        Review.objects.filter(pk=instance.pk)
+        .values_list('title_id', 'score')
+        .first()
+    )
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_save(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    previous = None if created else getattr(instance, '_loaded_rating', None)
+    if previous is None:
+        apply_review_change(instance.title_id, added=instance.score)
+    elif previous[0] != instance.title_id:
+        apply_review_change(previous[0], removed=previous[1])
+        apply_review_change(instance.title_id, added=instance.score)
+    else:
+        apply_review_change(instance.title_id, previous[1], instance.score)
+    instance._loaded_rating = (instance.title_id, instance.score)
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_delete(sender, instance, **kwargs):
+    apply_review_change(instance.title_id, removed=instance.score)
+
+
+@receiver(post_save, sender=Title)
+def update_title_version(sender, instance, raw, **kwargs):
+    if not raw:
+        touch_titles(pk=instance.pk)
+
+
+@receiver(post_save, sender=Genre_title)
+@receiver(post_delete, sender=Genre_title)
+def update_version_on_genre_title(sender, instance, raw=False, **kwargs):
+    if not raw and instance.title_id is not None:
+        touch_titles(pk=instance.title_id)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def update_version_on_title_genres(sender, instance, action, reverse,
+                                   pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        touch_titles(pk=instance.pk)
+    elif action == 'post_clear':
+        touch_titles(genre=instance.pk)
+    else:
+        touch_titles(pk__in=pk_set)
+
+
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+def update_version_on_category(sender, instance, raw=False, **kwargs):
+    if not raw:
+        touch_titles(category=instance.pk)
+
+
+@receiver(post_save, sender=Genre)
+@receiver(pre_delete, sender=Genre)
+def update_version_on_genre(sender, instance, raw=False, **kwargs):
+    if not raw:
+        touch_titles(genre=instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def update_version_on_comment(sender, instance, raw=False, **kwargs):
+    if not raw:
+        touch_review(instance.review_id)
+
+
+@receiver(pre_save, sender=User)
+def remember_author_name(sender, instance, raw, update_fields=None,
+                         **kwargs):
+    if raw or instance.pk is None or hasattr(instance, '_loaded_username'):
+        return
+    if update_fields is not None and 'username' not in update_fields:
+        return
+    instance._loaded_username = (
+        User.objects.filter(pk=instance.pk)
+        .values_list('username', flat=True)
+        .first()
+    )
+
+
+@receiver(post_save, sender=User)
+def update_version_on_author_name(sender, instance, created, raw,
+                                  update_fields=None, **kwargs):
+    """
+    Отзывы и комментарии выводят имя автора, а их ETag строится по
+    версии родителя: переименование обновляет версии произведений
+    с отзывами автора и отзывов с его комментариями.
+    """
+    if raw or update_fields is not None and 'username' not in update_fields:
+        return
+    previous = getattr(instance, '_loaded_username', None)
+    instance._loaded_username = instance.username
+    if created or previous in (None, instance.username):
+        return
+    touch_titles(reviews__author=instance.pk)
+    touch_reviews(comments__author=instance.pk)
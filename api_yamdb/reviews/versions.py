@@ -0,0 +1,21 @@
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Review, Title
+
+
+def touch_titles(**filters):
+    """Увеличивает версию произведений, чьё представление изменилось."""
+    Title.objects.filter(**filters).update(
+        version=F('version') + 1, modified=timezone.now()
+    )
+
+
+def touch_reviews(**filters):
+    Review.objects.filter(**filters).update(
+        version=F('version') + 1, modified=timezone.now()
+    )
+
+
+def touch_review(review_id):
+    touch_reviews(pk=review_id)
@@ -1,14 +1,31 @@
 from django.contrib import admin
 
-from .models import User
+from .models import DeadLetterEmail, OutboxEmail, User
 
 
 @admin.register(User)
 class UserAdmin(admin.ModelAdmin):
     list_display = (
-        'pk', 'username', 'confirmation_code', 'email', 'role',
+        'pk', 'username', 'email', 'role',
         'is_superuser', 'bio', 'first_name', 'last_name',
     )
     list_editable = ('role',)
     search_fields = ('username', 'role',)
     empty_value_display = '-пусто-'
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk', 'recipient', 'subject', 'attempts', 'next_attempt_at',
+        'last_error',
+    )
+    search_fields = ('recipient',)
+
+
+@admin.register(DeadLetterEmail)
+class DeadLetterEmailAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk', 'recipient', 'subject', 'attempts', 'failed_at', 'last_error',
+    )
+    search_fields = ('recipient',)
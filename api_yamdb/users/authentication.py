@@ -0,0 +1,130 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import User
+
+PRINCIPAL_KEY = 'users:principal:{user_id}'
+PRINCIPAL_CLAIMS = ('username', 'role', 'is_staff', 'is_superuser')
+
+
+def principal_claims(user):
+    return {claim: getattr(user, claim) for claim in PRINCIPAL_CLAIMS}
+
+
+def token_for_user(user):
+    """Access-токен, в который при выдаче записаны роль и флаги."""
+    refresh = RefreshToken.for_user(user)
+    for claim, value in principal_claims(user).items():
+        refresh[claim] = value
+    return refresh.access_token
+
+
+def remember_principal(user, deleted=False):
+    """
+    Запоминает актуальные роль и флаги пользователя на срок жизни
+    access-токена: токены, выданные до изменения, читают их отсюда.
+    С общим кэшем понижение роли действует сразу во всех процессах,
+    с кэшем процесса — не позже чем через PRINCIPAL_CACHE_TTL секунд.
+    """
+    state = principal_claims(user)
+    state['is_active'] = user.is_active and not deleted
+    cache.set(
+        PRINCIPAL_KEY.format(user_id=user.pk), state,
+        settings.SIMPLE_JWT['ACCESS_TOKEN_LIFETIME'].total_seconds()
+    )
+
+
+class PrincipalCache:
+    """
+    Ограниченный LRU-кэш процесса: id пользователя -> роль и флаги для
+    токенов без claims. Записи сбрасываются сигналами сохранения User
+    в этом процессе и живут не дольше PRINCIPAL_CACHE_TTL секунд, чтобы
+    изменения из других процессов тоже доходили.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, user_id):
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is None:
+                return None
+            expires, claims = entry
+            if expires < time.monotonic():
+                del self.entries[user_id]
+                return None
+            self.entries.move_to_end(user_id)
+            return claims
+
+    def set(self, user_id, claims):
+        with self.lock:
+            self.entries[user_id] = (time.monotonic() + self.ttl, claims)
+            self.entries.move_to_end(user_id)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def discard(self, user_id):
+        with self.lock:
+            self.entries.pop(user_id, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+principal_cache = PrincipalCache(
+    settings.PRINCIPAL_CACHE_SIZE, settings.PRINCIPAL_CACHE_TTL
+)
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWT-аутентификация без запроса к базе. Роль из claims токена
+    доверяется PRINCIPAL_CACHE_TTL секунд после выпуска; для более
+    старых токенов и токенов без claims роль проверяется по базе
+    и хранится в principal_cache не дольше того же срока. Поверх
+    накладываются изменения роли из кэша. Собранный пользователь
+    не загружен из базы — его нельзя сохранять.
+    """
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if 'role' in validated_token and self.is_fresh(validated_token):
+            claims = {
+                claim: validated_token[claim] for claim in PRINCIPAL_CLAIMS
+            }
+        else:
+            claims = principal_cache.get(user_id)
+            if claims is None:
+                user = super().get_user(validated_token)
+                principal_cache.set(user_id, principal_claims(user))
+                return user
+        claims = dict(claims, is_active=True)
+        claims.update(
+            cache.get(PRINCIPAL_KEY.format(user_id=user_id)) or {}
+        )
+        if not claims['is_active']:
+            raise AuthenticationFailed(
+                'Пользователь неактивен или удалён.', code='user_inactive'
+            )
+        return User(**{api_settings.USER_ID_FIELD: user_id}, **claims)
+
+    @staticmethod
+    def is_fresh(validated_token):
+        issued = validated_token.get('iat')
+        return (
+            issued is not None
+            and time.time() - issued < settings.PRINCIPAL_CACHE_TTL
+        )
@@ -0,0 +1,54 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+from users.outbox import claim_batch, deliver
+
+
+def deliver_batch(emails):
+    try:
+        return deliver(emails)
+    finally:
+        # У каждого потока своё соединение с базой.
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued e-mails in batches with retries and backoff'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int,
+                            default=settings.EMAIL_OUTBOX_BATCH_SIZE,
+                            help='E-mails sent over one mail connection')
+        parser.add_argument('--workers', type=int, default=4,
+                            help='Batches delivered in parallel')
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep polling the outbox instead of '
+                                 'exiting once it is drained')
+        parser.add_argument('--interval', type=float, default=5,
+                            help='Seconds to wait when the outbox is empty')
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            while True:
+                batches = []
+                for _ in range(workers):
+                    batch = claim_batch(options['batch_size'])
+                    if not batch:
+                        break
+                    batches.append(batch)
+                if batches:
+                    sent, retried, dead = map(
+                        sum, zip(*pool.map(deliver_batch, batches))
+                    )
+                    self.stdout.write(
+                        f'Sent {sent}, retrying {retried}, '
+                        f'dead-lettered {dead}'
+                    )
+                    continue
+                if not options['loop']:
+                    return
+                time.sleep(options['interval'])
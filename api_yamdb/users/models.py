@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.utils import timezone
 
 
 class User(AbstractUser):
@@ -15,11 +16,20 @@ class User(AbstractUser):
     email = models.EmailField(max_length=254, unique=True)
     bio = models.TextField(blank=True)
     role = models.SlugField(choices=ROLES, default=USER)
-    confirmation_code = models.SlugField(null=True, blank=True)
 
     class Meta:
         ordering = ['id']
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Имя автора входит в ответы с отзывами и комментариями: при его
+        # смене сигнал обновляет их версии. Отложенное имя прочитает
+        # сигнал pre_save.
+        if 'username' in instance.__dict__:
+            instance._loaded_username = instance.__dict__['username']
+        return instance
+
     @property
     def is_user(self):
         return self.role == self.USER
@@ -31,3 +41,54 @@ class User(AbstractUser):
     @property
     def is_moderator(self):
         return self.role == self.MODERATOR
+
+
+class OutboxEmail(models.Model):
+    """Письмо в очереди на отправку; удаляется после доставки."""
+    subject = models.CharField('Тема', max_length=255)
+    body = models.TextField('Текст')
+    from_email = models.CharField('Отправитель', max_length=254)
+    recipient = models.EmailField('Получатель', max_length=254)
+    created = models.DateTimeField('Создано', auto_now_add=True)
+    attempts = models.PositiveSmallIntegerField('Попытки', default=0)
+    next_attempt_at = models.DateTimeField(
+        'Следующая попытка',
+        default=timezone.now
+    )
+    claimed_by = models.CharField('Обработчик', max_length=32, blank=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+
+    class Meta:
+        verbose_name = 'Письмо в очереди'
+        verbose_name_plural = 'Очередь писем'
+        ordering = ['next_attempt_at', 'id']
+        indexes = [
+            models.Index(
+                fields=['next_attempt_at'],
+                name='outbox_next_attempt_idx'
+            ),
+            models.Index(fields=['claimed_by'], name='outbox_claimed_by_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.recipient}: {self.subject}'
+
+
+class DeadLetterEmail(models.Model):
+    """Письмо, которое не удалось доставить за все попытки."""
+    subject = models.CharField('Тема', max_length=255)
+    body = models.TextField('Текст')
+    from_email = models.CharField('Отправитель', max_length=254)
+    recipient = models.EmailField('Получатель', max_length=254)
+    created = models.DateTimeField('Создано')
+    attempts = models.PositiveSmallIntegerField('Попытки')
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    failed_at = models.DateTimeField('Отклонено', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Недоставленное письмо'
+        verbose_name_plural = 'Недоставленные письма'
+        ordering = ['-failed_at']
+
+    def __str__(self):
+        return f'{self.recipient}: {self.subject}'
@@ -0,0 +1,118 @@
+import logging
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import DeadLetterEmail, OutboxEmail
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue(subject, body, recipient, from_email=None):
+    """
+    Ставит письмо в очередь вместо отправки в запросе. В режиме
+    EMAIL_OUTBOX_EAGER письмо отправляется сразу после коммита
+    транзакции — для тестов и локальной разработки без обработчика.
+    """
+    email = OutboxEmail.objects.create(
+        subject=subject,
+        body=body,
+        from_email=from_email or settings.ADMIN_EMAIL,
+        recipient=recipient,
+    )
+    if settings.EMAIL_OUTBOX_EAGER:
+        transaction.on_commit(lambda: deliver([email]))
+    return email
+
+
+def claim_batch(size):
+    """
+    Забирает до size писем, срок отправки которых наступил. Письма
+    помечаются меткой обработчика и откладываются на EMAIL_OUTBOX_LEASE
+    секунд: параллельные обработчики их не возьмут, а после сбоя
+    обработчика письма снова станут доступны.
+    """
+    now = timezone.now()
+    token = uuid.uuid4().hex
+    due = OutboxEmail.objects.filter(next_attempt_at__lte=now)
+    ids = list(due.values_list('pk', flat=True)[:size])
+    if not ids:
+        return []
+    due.filter(pk__in=ids).update(
+        claimed_by=token,
+        next_attempt_at=now + timedelta(seconds=settings.EMAIL_OUTBOX_LEASE),
+    )
+    return list(OutboxEmail.objects.filter(claimed_by=token))
+
+
+def retry_delay(attempts):
+    """Экспоненциальная задержка перед попыткой номер attempts + 1."""
+    return timedelta(
+        seconds=settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** (attempts - 1)
+    )
+
+
+def deliver(emails):
+    """
+    Отправляет письма через одно соединение с почтовым бэкендом.
+    Доставленные письма удаляются, остальные откладываются с растущей
+    задержкой, а после EMAIL_OUTBOX_MAX_ATTEMPTS попыток переносятся
+    в DeadLetterEmail. Возвращает (отправлено, отложено, отклонено).
+    """
+    sent, failed = [], []
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as error:
+        logger.warning('Mail backend is unavailable: %s', error)
+        failed = [(email, error) for email in emails]
+    else:
+        for email in emails:
+            message = EmailMessage(
+                email.subject, email.body, email.from_email,
+                [email.recipient], connection=connection
+            )
+            try:
+                message.send()
+            except Exception as error:
+                failed.append((email, error))
+            else:
+                sent.append(email.pk)
+        connection.close()
+
+    now = timezone.now()
+    retried, dead = [], []
+    for email, error in failed:
+        email.attempts += 1
+        email.last_error = repr(error)
+        email.claimed_by = ''
+        if email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+            dead.append(email)
+        else:
+            email.next_attempt_at = now + retry_delay(email.attempts)
+            retried.append(email)
+    with transaction.atomic():
+        OutboxEmail.objects.filter(
+            pk__in=sent + [email.pk for email in dead]
+        ).delete()
+        OutboxEmail.objects.bulk_update(
+            retried,
+            ['attempts', 'last_error', 'claimed_by', 'next_attempt_at']
+        )
+        DeadLetterEmail.objects.bulk_create(
+            DeadLetterEmail(
+                subject=email.subject,
+                body=email.body,
+                from_email=email.from_email,
+                recipient=email.recipient,
+                created=email.created,
+                attempts=email.attempts,
+                last_error=email.last_error,
+            )
+            for email in dead
+        )
+    return len(sent), len(retried), len(dead)
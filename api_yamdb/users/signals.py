@@ -0,0 +1,18 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import principal_cache, remember_principal
+from .models import User
+
+
+@receiver(post_save, sender=User)
+def update_principal(sender, instance, raw, **kwargs):
+    if not raw:
+        principal_cache.discard(instance.pk)
+        remember_principal(instance)
+
+
+@receiver(post_delete, sender=User)
+def revoke_principal(sender, instance, **kwargs):
+    principal_cache.discard(instance.pk)
+    remember_principal(instance, deleted=True)
@@ -0,0 +1,62 @@
+import time
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare, salted_hmac
+from django.utils.http import base36_to_int, int_to_base36
+
+
+class ConfirmationCodeGenerator:
+    """
+    Код подтверждения без хранения в базе, по образцу
+    PasswordResetTokenGenerator: время выпуска и HMAC от пользователя и
+    времени. Выпуск кода ничего не пишет, проверка не читает базу.
+    Код действует CONFIRMATION_CODE_TIMEOUT секунд. В HMAC входит
+    last_login: использование кода обновляет его в базе, и все ранее
+    выпущенные коды пользователя перестают подходить.
+    """
+    key_salt = 'users.tokens.ConfirmationCodeGenerator'
+
+    def make_code(self, user):
+        return self._make_code(user, int(time.time()))
+
+    def check_code(self, user, code):
+        """Возвращает возраст действующего кода в секундах или None."""
+        try:
+            timestamp, _ = code.split('-')
+            timestamp = base36_to_int(timestamp)
+        except (AttributeError, ValueError):
+            return None
+        if not constant_time_compare(self._make_code(user, timestamp), code):
+            return None
+        age = int(time.time()) - timestamp
+        if not 0 <= age <= settings.CONFIRMATION_CODE_TIMEOUT:
+            return None
+        return age
+
+    def use_code(self, user, code):
+        """
+        Проверяет код и отмечает его использованным, обновляя last_login.
+        Обновление условно по прочитанному last_login, поэтому из
+        параллельных запросов с одним кодом пройдёт один.
+        """
+        if self.check_code(user, code) is None:
+            return False
+        now = timezone.now()
+        used = type(user).objects.filter(
+            pk=user.pk, last_login=user.last_login
+        ).update(last_login=now)
+        if used:
+            user.last_login = now
+        return bool(used)
+
+    def _make_code(self, user, timestamp):
+        last_login = user.last_login.isoformat() if user.last_login else ''
+        digest = salted_hmac(
+            self.key_salt,
+            f'{user.pk}{user.username}{user.email}{last_login}{timestamp}'
+        ).hexdigest()[:20]
+        return f'{int_to_base36(timestamp)}-{digest}'
+
+
+confirmation_code_generator = ConfirmationCodeGenerator()
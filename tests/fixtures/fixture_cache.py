@@ -0,0 +1,19 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    from django.core.cache import cache
+
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_principal_cache():
+    from users.authentication import principal_cache
+
+    principal_cache.clear()
+    yield
+    principal_cache.clear()
@@ -0,0 +1,7 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def eager_outbox(settings):
+    # Письма отправляются сразу, чтобы тесты видели их в mail.outbox.
+    settings.EMAIL_OUTBOX_EAGER = True
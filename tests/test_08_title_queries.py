@@ -0,0 +1,99 @@
+import pytest
+from rest_framework.pagination import PageNumberPagination
+
+from reviews.models import Category, Genre, Genre_title, Title
+
+
+def create_catalogue(size):
+    Category.objects.bulk_create(
+        Category(name=f'Категория {i}', slug=f'category-{i}')
+        for i in range(3)
+    )
+    Genre.objects.bulk_create(
+        Genre(name=f'Жанр {i}', slug=f'genre-{i}') for i in range(4)
+    )
+    categories = list(Category.objects.all())
+    genres = list(Genre.objects.all())
+    Title.objects.bulk_create(
+        Title(name=f'Произведение {i:04}', year=2000, description='',
+              category=categories[i % len(categories)])
+        for i in range(size)
+    )
+    Genre_title.objects.bulk_create(
+        Genre_title(title=title, genre=genre)
+        for title in Title.objects.all()
+        for genre in genres[:2]
+    )
+
+
+class Test08TitleQueries:
+
+    @pytest.mark.parametrize('page_size', [5, 50, 500])
+    @pytest.mark.django_db(transaction=True)
+    def test_01_title_list_query_count(self, client, monkeypatch,
+                                       django_assert_num_queries, page_size):
+        create_catalogue(page_size)
+        monkeypatch.setattr(PageNumberPagination, 'page_size', page_size)
+        # count + страница произведений с категориями + жанры страницы
+        with django_assert_num_queries(3):
+            response = client.get('/api/v1/titles/')
+        data = response.json()
+        assert len(data['results']) == page_size, (
+            'Проверьте, что при GET запросе `/api/v1/titles/` '
+            'возвращается страница заданного размера'
+        )
+        assert all(len(title['genre']) == 2 for title in data['results']), (
+            'Проверьте, что при GET запросе `/api/v1/titles/` '
+            'для каждого произведения возвращаются его жанры'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_title_detail_query_count(self, client,
+                                         django_assert_num_queries):
+        create_catalogue(5)
+        title = Title.objects.first()
+        # версия для ETag + произведение с категорией + жанры
+        with django_assert_num_queries(3):
+            response = client.get(f'/api/v1/titles/{title.id}/')
+        assert response.json()['category']['slug'] == title.category.slug, (
+            'Проверьте, что при GET запросе `/api/v1/titles/{title_id}/` '
+            'возвращается категория произведения'
+        )
+
+    @pytest.mark.parametrize('genres', [1, 4])
+    @pytest.mark.django_db(transaction=True)
+    def test_03_title_create_query_count(self, admin_client, admin,
+                                         django_assert_num_queries, genres):
+        create_catalogue(0)
+        data = {
+            'name': 'Поворот', 'year': 2000, 'description': 'Крутое пике',
+            'category': 'category-0',
+            'genre': [f'genre-{i}' for i in range(genres)],
+        }
+        # пользователь + категория + жанры одним запросом + BEGIN +
+        # произведение + версия + связи с жанрами одной вставкой +
+        # жанры для ответа
+        with django_assert_num_queries(8):
+            response = admin_client.post('/api/v1/titles/', data=data,
+                                         format='json')
+        assert response.status_code == 201, (
+            'Проверьте, что при POST запросе `/api/v1/titles/` '
+            'произведение создаётся'
+        )
+        assert len(response.json()['genre']) == genres
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_title_unknown_genres(self, admin_client):
+        create_catalogue(0)
+        data = {
+            'name': 'Поворот', 'year': 2000, 'description': 'Крутое пике',
+            'category': 'category-0',
+            'genre': ['genre-0', 'horror', 'noir'],
+        }
+        response = admin_client.post('/api/v1/titles/', data=data,
+                                     format='json')
+        assert response.status_code == 400
+        assert 'horror, noir' in response.json()['genre'][0], (
+            'Проверьте, что при POST запросе `/api/v1/titles/` '
+            'все неизвестные жанры перечисляются в одной ошибке'
+        )
@@ -0,0 +1,75 @@
+import pytest
+
+from reviews.models import Review, Title
+
+
+def create_title_reviews(django_user_model, count):
+    title = Title.objects.create(name='Произведение', year=2000,
+                                 description='')
+    for i in range(count):
+        author = django_user_model.objects.create_user(
+            username=f'author{i}', email=f'author{i}@yamdb.fake'
+        )
+        Review.objects.create(title=title, author=author,
+                              text=f'Отзыв {i}', score=5)
+    return title
+
+
+def walk(client, url):
+    ids = []
+    while url:
+        data = client.get(url).json()
+        ids.extend(review['id'] for review in data['results'])
+        url = data['next']
+    return ids
+
+
+class Test09KeysetPagination:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_cursor_walks_all_reviews(self, client, django_user_model):
+        title = create_title_reviews(django_user_model, 12)
+        url = f'/api/v1/titles/{title.id}/reviews/?pagination=cursor'
+        response = client.get(url)
+        assert response.status_code == 200
+        data = response.json()
+        assert 'count' not in data and data['previous'] is None, (
+            'Проверьте, что в keyset-режиме не считается общее количество '
+            'записей и у первой страницы нет ссылки `previous`'
+        )
+        expected = list(Review.objects.filter(title=title).order_by(
+            '-pub_date', '-id').values_list('id', flat=True))
+        assert walk(client, url) == expected, (
+            'Проверьте, что keyset-пагинация возвращает все отзывы '
+            'по убыванию (pub_date, id) без пропусков и повторов'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_cursor_is_stable_on_insert(self, client, django_user_model):
+        title = create_title_reviews(django_user_model, 7)
+        url = f'/api/v1/titles/{title.id}/reviews/?pagination=cursor'
+        first = client.get(url).json()
+        author = django_user_model.objects.create_user(
+            username='latecomer', email='latecomer@yamdb.fake'
+        )
+        Review.objects.create(title=title, author=author, text='Новый',
+                              score=1)
+        second = client.get(first['next']).json()
+        first_ids = [review['id'] for review in first['results']]
+        second_ids = [review['id'] for review in second['results']]
+        assert not set(first_ids) & set(second_ids)
+        assert len(first_ids) + len(second_ids) == 7, (
+            'Проверьте, что новые отзывы не сдвигают курсор следующей страницы'
+        )
+        previous = client.get(second['previous']).json()
+        assert [review['id'] for review in previous['results']] == (
+            first_ids), (
+            'Проверьте, что ссылка `previous` возвращает предыдущую страницу'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_invalid_cursor(self, client, django_user_model):
+        title = create_title_reviews(django_user_model, 1)
+        response = client.get(
+            f'/api/v1/titles/{title.id}/reviews/?cursor=broken')
+        assert response.status_code == 404
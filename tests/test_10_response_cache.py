@@ -0,0 +1,86 @@
+import pytest
+
+from .common import create_categories, create_titles
+
+
+class Test10ResponseCache:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_category_list_cached(self, client, admin_client):
+        create_categories(admin_client)
+        response = client.get('/api/v1/categories/')
+        assert response['X-Cache'] == 'MISS'
+        cached = client.get('/api/v1/categories/')
+        assert cached['X-Cache'] == 'HIT', (
+            'Проверьте, что повторный GET запрос `/api/v1/categories/` '
+            'обслуживается из кэша'
+        )
+        assert cached.json() == response.json()
+
+        admin_client.delete('/api/v1/categories/films/')
+        response = client.get('/api/v1/categories/')
+        assert response['X-Cache'] == 'MISS', (
+            'Проверьте, что удаление категории сбрасывает кэш списка'
+        )
+        assert response.json()['count'] == 1
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_title_list_invalidation(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        client.get('/api/v1/titles/')
+        assert client.get('/api/v1/titles/')['X-Cache'] == 'HIT'
+
+        admin_client.post(f'/api/v1/titles/{titles[0]["id"]}/reviews/',
+                          data={'text': 'Отзыв', 'score': 8})
+        response = client.get('/api/v1/titles/')
+        assert response['X-Cache'] == 'MISS', (
+            'Проверьте, что новый отзыв сбрасывает кэш списка произведений'
+        )
+        rating = {title['id']: title['rating']
+                  for title in response.json()['results']}
+        assert rating[titles[0]['id']] == 8
+
+        admin_client.delete('/api/v1/genres/drama/')
+        response = client.get('/api/v1/titles/')
+        assert response['X-Cache'] == 'MISS', (
+            'Проверьте, что удаление жанра сбрасывает кэш списка произведений'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_cache_stats(self, client, admin_client):
+        client.get('/api/v1/genres/')
+        client.get('/api/v1/genres/')
+        assert client.get('/api/v1/cache/stats/').status_code == 401
+        response = admin_client.get('/api/v1/cache/stats/')
+        assert response.status_code == 200
+        assert response.json()['genres'] == {'hits': 1, 'misses': 1}
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_invalidation_after_commit(self, client, admin_client):
+        from api.v1.cache import generation
+        from django.db import transaction
+        from reviews.models import Category
+
+        create_categories(admin_client)
+        before = generation('categories')
+        with transaction.atomic():
+            Category.objects.create(name='Музыка', slug='music')
+            assert generation('categories') == before, (
+                'Проверьте, что кэш сбрасывается только после коммита '
+                'транзакции'
+            )
+        assert generation('categories') != before
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_cache_key_includes_host(self, client, admin_client):
+        for number in range(6):
+            admin_client.post('/api/v1/genres/', data={
+                'name': f'Жанр {number}', 'slug': f'genre-{number}'})
+        response = client.get('/api/v1/genres/', HTTP_HOST='one.example')
+        assert response.json()['next'].startswith('http://one.example/')
+        response = client.get('/api/v1/genres/', HTTP_HOST='two.example')
+        assert response['X-Cache'] == 'MISS', (
+            'Проверьте, что ответы с абсолютными ссылками кэшируются '
+            'отдельно для каждого хоста'
+        )
+        assert response.json()['next'].startswith('http://two.example/')
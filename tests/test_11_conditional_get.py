@@ -0,0 +1,73 @@
+import pytest
+
+from .common import create_comments, create_reviews, create_titles
+
+
+class Test11ConditionalGet:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_title_etag(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        response = client.get(url)
+        etag = response['ETag']
+        assert etag and response.has_header('Last-Modified'), (
+            'Проверьте, что GET запрос `/api/v1/titles/{title_id}/` '
+            'возвращает заголовки ETag и Last-Modified'
+        )
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        assert not response.content
+
+        admin_client.patch(url, data={'name': 'Поворот обратно'})
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что изменение произведения меняет его ETag'
+        )
+        assert response.json()['name'] == 'Поворот обратно'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_reviews_and_comments_etag(self, client, admin_client, admin):
+        reviews, titles, _, _ = create_reviews(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        etag = client.get(url)['ETag']
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+        admin_client.patch(f'{url}{reviews[0]["id"]}/', data={'text': 'new'})
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200, (
+            'Проверьте, что изменение отзыва меняет ETag списка отзывов'
+        )
+
+        comments_url = f'{url}{reviews[0]["id"]}/comments/'
+        response = client.get(comments_url)
+        etag = response['ETag']
+        last_modified = response['Last-Modified']
+        assert client.get(
+            comments_url, HTTP_IF_MODIFIED_SINCE=last_modified
+        ).status_code == 304
+        admin_client.post(comments_url, data={'text': 'Комментарий'})
+        assert client.get(
+            comments_url, HTTP_IF_NONE_MATCH=etag
+        ).status_code == 200, (
+            'Проверьте, что новый комментарий меняет ETag списка комментариев'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_author_rename_changes_etag(self, client, admin_client, admin):
+        _, reviews, titles, user, _ = create_comments(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        comments_url = f'{url}{reviews[0]["id"]}/comments/'
+        etags = [client.get(url)['ETag'], client.get(comments_url)['ETag']]
+
+        response = admin_client.patch(f'/api/v1/users/{user.username}/',
+                                      data={'username': 'renamed'})
+        assert response.status_code == 200
+        for current, etag in zip((url, comments_url), etags):
+            response = client.get(current, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == 200, (
+                'Проверьте, что смена имени автора меняет ETag списков '
+                'его отзывов и комментариев'
+            )
+            assert 'renamed' in {
+                item['author'] for item in response.json()['results']
+            }
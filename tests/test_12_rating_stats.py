@@ -0,0 +1,44 @@
+import pytest
+
+from .common import create_reviews, create_titles
+
+
+class Test12RatingStats:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_title_rating_stats(self, client, admin_client, admin):
+        reviews, titles, _, _ = create_reviews(admin_client, admin)
+        response = client.get(f'/api/v1/titles/{titles[0]["id"]}/rating-stats/')
+        assert response.status_code == 200, (
+            'Проверьте, что GET запрос `/api/v1/titles/{title_id}/rating-stats/` '
+            'доступен без токена и возвращает статус 200'
+        )
+        data = response.json()
+        assert data['count'] == 3
+        assert data['mean'] == 4
+        assert data['median'] == 4
+        assert data['histogram']['3'] == 1 and data['histogram']['5'] == 1
+        assert sum(data['histogram'].values()) == 3
+
+        admin_client.delete(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/')
+        data = client.get(
+            f'/api/v1/titles/{titles[0]["id"]}/rating-stats/').json()
+        assert data['count'] == 2 and data['median'] == 3.5, (
+            'Проверьте, что удаление отзыва обновляет статистику оценок'
+        )
+        assert data['histogram']['5'] == 0
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_bulk_rating_stats(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        ids = ','.join(str(title['id']) for title in titles)
+        response = client.get(f'/api/v1/titles/rating-stats/?ids={ids}')
+        assert response.status_code == 200
+        data = response.json()
+        assert [item['id'] for item in data] == sorted(
+            title['id'] for title in titles)
+        assert all(item['count'] == 0 and item['mean'] is None
+                   for item in data)
+        response = client.get('/api/v1/titles/rating-stats/?ids=1,abc')
+        assert response.status_code == 400
@@ -0,0 +1,74 @@
+import pytest
+
+from .common import create_comments, create_titles
+
+
+class Test13Search:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_search_titles(self, client, admin_client, admin):
+        create_comments(admin_client, admin)
+        response = client.get('/api/v1/search/?q=повор')
+        assert response.status_code == 200, (
+            'Проверьте, что GET запрос `/api/v1/search/` доступен без токена'
+        )
+        results = response.json()['results']
+        assert len(results) == 1, (
+            'Проверьте, что поиск находит произведение по префиксу слова'
+        )
+        assert '<mark>Поворот</mark>' in results[0]['snippet']
+
+        response = client.get('/api/v1/search/?q=драма года')
+        assert [hit['snippet'] for hit in response.json()['results']] == [
+            'Главная <mark>драма</mark> <mark>года</mark>'
+        ]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_search_reviews_and_comments(self, client, admin_client,
+                                            admin):
+        comments, reviews, titles, _, _ = create_comments(admin_client, admin)
+        results = client.get(
+            '/api/v1/search/?q=qwerty1&type=reviews').json()['results']
+        assert [hit['id'] for hit in results] == [reviews[1]['id']]
+        assert results[0]['title_id'] == titles[0]['id']
+
+        results = client.get(
+            '/api/v1/search/?q=qwerty&type=comments').json()['results']
+        assert {hit['id'] for hit in results} == {
+            comment['id'] for comment in comments}
+        assert results[0]['review_id'] == reviews[0]['id']
+
+        admin_client.patch(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/'
+            f'comments/{comments[0]["id"]}/', data={'text': 'обновлено'})
+        results = client.get(
+            '/api/v1/search/?q=обновл&type=comments').json()['results']
+        assert [hit['id'] for hit in results] == [comments[0]['id']], (
+            'Проверьте, что индекс поиска обновляется при изменении текста'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_search_validation(self, client):
+        assert client.get('/api/v1/search/').status_code == 400
+        response = client.get('/api/v1/search/?q=x&type=users')
+        assert response.status_code == 400
+        response = client.get('/api/v1/search/?q="OR*')
+        assert response.status_code == 200
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_snippet_escapes_html(self, client, admin_client, settings):
+        titles, _, _ = create_titles(admin_client)
+        admin_client.post(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/',
+            data={'text': 'Creepy <img src=x onerror=alert(1)> <script>',
+                  'score': 1}
+        )
+        for backend in (None, 'reviews.search.ContainsBackend'):
+            settings.SEARCH_BACKEND = backend
+            results = client.get(
+                '/api/v1/search/?q=creepy&type=reviews').json()['results']
+            snippet = results[0]['snippet']
+            assert '<img' not in snippet and '<script>' not in snippet, (
+                'Проверьте, что текст во фрагменте поиска экранируется'
+            )
+            assert snippet.startswith('<mark>Creepy</mark> &lt;img'), snippet
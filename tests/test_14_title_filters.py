@@ -0,0 +1,75 @@
+import pytest
+
+from reviews.models import Category, Genre, Genre_title, Title
+
+
+def create_titles():
+    category = Category.objects.create(name='Фильм', slug='movie')
+    other = Category.objects.create(name='Книга', slug='book')
+    drama = Genre.objects.create(name='Драма', slug='drama')
+    dra = Genre.objects.create(name='Дра', slug='dra')
+    comedy = Genre.objects.create(name='Комедия', slug='comedy')
+    titles = {
+        'first': Title.objects.create(name='Первое', year=1999,
+                                      category=category),
+        'second': Title.objects.create(name='Второе', year=2005,
+                                       category=category),
+        'third': Title.objects.create(name='Третье', year=2010,
+                                      category=other),
+    }
+    Genre_title.objects.bulk_create([
+        Genre_title(title=titles['first'], genre=drama),
+        Genre_title(title=titles['first'], genre=comedy),
+        Genre_title(title=titles['second'], genre=drama),
+        Genre_title(title=titles['third'], genre=dra),
+    ])
+    return titles
+
+
+def names(response):
+    return sorted(title['name'] for title in response.json()['results'])
+
+
+class Test14TitleFilters:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_slug_filters_are_exact(self, client):
+        create_titles()
+        assert names(client.get('/api/v1/titles/?genre=dra')) == [
+            'Третье'], (
+            'Проверьте, что фильтр `genre` сравнивает slug жанра точно'
+        )
+        assert names(client.get('/api/v1/titles/?category=mov')) == [], (
+            'Проверьте, что фильтр `category` сравнивает slug точно'
+        )
+        assert names(
+            client.get('/api/v1/titles/?category=movie,book')
+        ) == ['Второе', 'Первое', 'Третье'], (
+            'Проверьте, что фильтр `category` принимает список slug'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_genre_modes(self, client):
+        create_titles()
+        response = client.get('/api/v1/titles/?genre=drama,comedy')
+        assert names(response) == ['Второе', 'Первое'], (
+            'Проверьте, что по умолчанию фильтр `genre` оставляет '
+            'произведения с любым из жанров без повторов'
+        )
+        response = client.get(
+            '/api/v1/titles/?genre=drama,comedy&genre_mode=all')
+        assert names(response) == ['Первое'], (
+            'Проверьте, что `genre_mode=all` оставляет произведения '
+            'со всеми указанными жанрами'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_year_range(self, client):
+        create_titles()
+        response = client.get('/api/v1/titles/?year_min=2000&year_max=2010')
+        assert names(response) == ['Второе', 'Третье'], (
+            'Проверьте, что `year_min` и `year_max` задают диапазон годов'
+        )
+        assert names(client.get('/api/v1/titles/?year=200')) == [], (
+            'Проверьте, что фильтр `year` сравнивает год точно'
+        )
@@ -0,0 +1,58 @@
+import pytest
+
+from reviews.models import Genre_title, Title
+
+from .test_14_title_filters import create_titles
+
+
+class Test15TitleFacets:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_facets_follow_filters(self, client):
+        create_titles()
+        response = client.get('/api/v1/titles/')
+        assert 'facets' not in response.json(), (
+            'Проверьте, что счётчики возвращаются только с `facets=true`'
+        )
+        facets = client.get('/api/v1/titles/?facets=true').json()['facets']
+        assert facets['category'] == [
+            {'slug': 'movie', 'name': 'Фильм', 'count': 2},
+            {'slug': 'book', 'name': 'Книга', 'count': 1},
+        ], 'Проверьте счётчики произведений по категориям'
+        assert facets['genre'] == [
+            {'slug': 'drama', 'name': 'Драма', 'count': 2},
+            {'slug': 'comedy', 'name': 'Комедия', 'count': 1},
+            {'slug': 'dra', 'name': 'Дра', 'count': 1},
+        ], 'Проверьте счётчики произведений по жанрам'
+        assert facets['decade'] == [
+            {'decade': 1990, 'count': 1},
+            {'decade': 2000, 'count': 1},
+            {'decade': 2010, 'count': 1},
+        ], 'Проверьте счётчики произведений по десятилетиям'
+
+        facets = client.get(
+            '/api/v1/titles/?facets=true&genre=drama').json()['facets']
+        assert facets['category'] == [
+            {'slug': 'movie', 'name': 'Фильм', 'count': 2},
+        ], 'Проверьте, что счётчики считаются по отфильтрованному списку'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_facets_cache_invalidation(self, client,
+                                          django_assert_num_queries):
+        titles = create_titles()
+        client.get('/api/v1/titles/?facets=true')
+        # count + страница + жанры страницы; счётчики берутся из кэша
+        with django_assert_num_queries(3):
+            response = client.get('/api/v1/titles/?facets=true&page=1')
+        assert response.json()['facets']['decade'][0]['count'] == 1
+
+        Genre_title.objects.filter(title=titles['third']).delete()
+        Title.objects.filter(pk=titles['second'].pk).delete()
+        facets = client.get('/api/v1/titles/?facets=true').json()['facets']
+        assert facets['genre'] == [
+            {'slug': 'comedy', 'name': 'Комедия', 'count': 1},
+            {'slug': 'drama', 'name': 'Драма', 'count': 1},
+        ], (
+            'Проверьте, что счётчики пересчитываются после изменения '
+            'произведений и их жанров'
+        )
@@ -0,0 +1,109 @@
+import pytest
+
+from reviews.models import Category, Genre, Title
+
+
+class Test16Bulk:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_bulk_create_titles(self, admin_client, user_client,
+                                   django_assert_max_num_queries):
+        Category.objects.create(name='Фильм', slug='movie')
+        Genre.objects.bulk_create([
+            Genre(name='Драма', slug='drama'),
+            Genre(name='Комедия', slug='comedy'),
+        ])
+        items = [
+            {'name': f'Произведение {i}', 'year': 2000, 'description': 'Фильм',
+             'category': 'movie', 'genre': ['drama', 'comedy']}
+            for i in range(20)
+        ]
+        items.append({'name': 'Без жанра', 'year': 2000,
+                      'category': 'movie', 'genre': ['horror', 'noir']})
+        response = user_client.post('/api/v1/titles/bulk/', data=items,
+                                    format='json')
+        assert response.status_code == 403, (
+            'Проверьте, что пакетные изменения доступны только администратору'
+        )
+        # Число запросов не зависит от размера пакета.
+        with django_assert_max_num_queries(7):
+            response = admin_client.post('/api/v1/titles/bulk/', data=items,
+                                         format='json')
+        assert response.status_code == 200
+        results = response.json()['results']
+        assert [result['status'] for result in results] == [201] * 20 + [400]
+        assert 'horror' in str(results[-1]['errors']['genre'])
+        title = Title.objects.get(pk=results[0]['id'])
+        assert title.name == 'Произведение 0'
+        assert sorted(title.genre.values_list('slug', flat=True)) == [
+            'comedy', 'drama'
+        ], 'Проверьте, что пакетное создание сохраняет жанры произведений'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_bulk_update_and_delete_titles(self, admin_client):
+        category = Category.objects.create(name='Фильм', slug='movie')
+        Genre.objects.bulk_create([
+            Genre(name='Драма', slug='drama'),
+            Genre(name='Комедия', slug='comedy'),
+        ])
+        titles = [
+            Title.objects.create(name=f'Произведение {i}', year=2000,
+                                 category=category)
+            for i in range(2)
+        ]
+        titles[0].genre.add(Genre.objects.get(slug='drama'))
+        response = admin_client.patch(
+            '/api/v1/titles/bulk/',
+            data=[{'id': titles[0].id, 'year': 1999, 'genre': ['comedy']},
+                  {'id': titles[1].id, 'name': 'Новое'},
+                  {'id': 0, 'name': 'Нет такого'},
+                  {'name': 'Без id'}],
+            format='json'
+        )
+        assert [result['status'] for result in response.json()['results']] \
+            == [200, 200, 404, 400]
+        titles[0].refresh_from_db()
+        assert titles[0].year == 1999
+        assert list(titles[0].genre.values_list('slug', flat=True)) == [
+            'comedy'
+        ], 'Проверьте, что пакетное обновление меняет жанры произведения'
+        assert titles[0].version > 0
+        response = admin_client.get(f'/api/v1/titles/{titles[1].id}/')
+        assert response.json()['name'] == 'Новое'
+
+        response = admin_client.delete(
+            '/api/v1/titles/bulk/',
+            data=[{'id': title.id} for title in titles],
+            format='json'
+        )
+        assert [result['status'] for result in response.json()['results']] \
+            == [204, 204]
+        assert not Title.objects.exists()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_bulk_genres_unique_slug(self, admin_client):
+        Genre.objects.create(name='Драма', slug='drama')
+        response = admin_client.post(
+            '/api/v1/genres/bulk/',
+            data=[{'name': 'Комедия', 'slug': 'comedy'},
+                  {'name': 'Драма', 'slug': 'drama'},
+                  {'name': 'Нуар', 'slug': 'noir'},
+                  {'name': 'Нуар 2', 'slug': 'noir'}],
+            format='json'
+        )
+        assert [result['status'] for result in response.json()['results']] \
+            == [201, 400, 400, 400], (
+            'Проверьте, что пакетное создание проверяет уникальность `slug`'
+        )
+        assert Genre.objects.count() == 2
+        response = admin_client.patch(
+            '/api/v1/genres/bulk/',
+            data=[{'slug': 'comedy', 'name': 'Комедия положений'}],
+            format='json'
+        )
+        assert response.json()['results'] == [{'status': 200,
+                                               'slug': 'comedy'}]
+        assert Genre.objects.get(slug='comedy').name == 'Комедия положений'
+        response = admin_client.post('/api/v1/categories/bulk/', data={},
+                                     format='json')
+        assert response.status_code == 400
@@ -0,0 +1,60 @@
+from datetime import timedelta
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+
+from users.models import DeadLetterEmail, OutboxEmail
+
+
+class Test17Outbox:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_signup_queues_email(self, client, settings):
+        settings.EMAIL_OUTBOX_EAGER = False
+        response = client.post('/api/v1/auth/signup/', data={
+            'username': 'queued', 'email': 'queued@yamdb.fake'
+        })
+        assert response.status_code == 200
+        assert len(mail.outbox) == 0, (
+            'Проверьте, что письмо с кодом не отправляется в запросе'
+        )
+        assert OutboxEmail.objects.filter(
+            recipient='queued@yamdb.fake').exists(), (
+            'Проверьте, что письмо с кодом ставится в очередь'
+        )
+        call_command('sendoutbox', batch_size=10, workers=2)
+        assert [message.to for message in mail.outbox] == [
+            ['queued@yamdb.fake']
+        ], 'Проверьте, что команда sendoutbox доставляет письма из очереди'
+        assert not OutboxEmail.objects.exists()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_retries_and_dead_letter(self, settings, monkeypatch):
+        settings.EMAIL_OUTBOX_EAGER = False
+        settings.EMAIL_OUTBOX_MAX_ATTEMPTS = 2
+
+        def fail(self, messages):
+            raise ConnectionError('SMTP недоступен')
+
+        monkeypatch.setattr(EmailBackend, 'send_messages', fail)
+        email = OutboxEmail.objects.create(
+            subject='Тема', body='Текст', from_email='admin@mail.ru',
+            recipient='user@yamdb.fake'
+        )
+        call_command('sendoutbox')
+        email.refresh_from_db()
+        assert email.attempts == 1, (
+            'Проверьте, что неудачная отправка откладывается для повтора'
+        )
+        assert email.next_attempt_at - email.created > timedelta(seconds=30)
+
+        OutboxEmail.objects.update(next_attempt_at=email.created)
+        call_command('sendoutbox')
+        assert not OutboxEmail.objects.exists()
+        dead = DeadLetterEmail.objects.get()
+        assert dead.attempts == 2 and 'SMTP' in dead.last_error, (
+            'Проверьте, что после всех попыток письмо переносится '
+            'в DeadLetterEmail'
+        )
@@ -0,0 +1,46 @@
+import pytest
+
+from users.models import OutboxEmail, User
+
+
+class Test18SignupFlow:
+    url_signup = '/api/v1/auth/signup/'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_signup_queries(self, client, settings,
+                               django_assert_num_queries):
+        settings.EMAIL_OUTBOX_EAGER = False
+        data = {'username': 'new_user', 'email': 'new_user@yamdb.fake'}
+        # поиск по username или email + BEGIN + запись пользователя
+        # в точке сохранения (3) + письмо в очередь. Записей две, а не
+        # одна: письмо ставится в очередь в транзакции регистрации,
+        # чтобы код не потерялся при сбое почты.
+        with django_assert_num_queries(6):
+            response = client.post(self.url_signup, data=data)
+        assert response.status_code == 200
+        assert User.objects.filter(username='new_user').exists()
+
+        # поиск + BEGIN + письмо в очередь: код не хранится в базе,
+        # единственная запись — письмо
+        with django_assert_num_queries(3):
+            response = client.post(self.url_signup, data=data)
+        assert response.status_code == 200, (
+            'Проверьте, что повторная регистрация с той же парой '
+            'username и email отправляет новый код'
+        )
+        assert OutboxEmail.objects.count() == 2
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_signup_throttled_per_email(self, client):
+        data = {'username': 'spam_target', 'email': 'target@yamdb.fake'}
+        for _ in range(5):
+            assert client.post(self.url_signup, data=data).status_code == 200
+        response = client.post(
+            self.url_signup,
+            data={'username': 'spam_target', 'email': 'TARGET@yamdb.fake'},
+            REMOTE_ADDR='10.0.0.2'
+        )
+        assert response.status_code == 429, (
+            'Проверьте, что число писем на один email ограничено '
+            'независимо от IP'
+        )
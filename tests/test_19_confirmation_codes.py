@@ -0,0 +1,75 @@
+import re
+import time
+
+import pytest
+from django.core import mail
+
+from users.models import User
+from users.tokens import confirmation_code_generator
+
+
+def signup(client, username='coder'):
+    client.post('/api/v1/auth/signup/', data={
+        'username': username, 'email': f'{username}@yamdb.fake'
+    })
+    return re.search(r': (\S+)$', mail.outbox[-1].body).group(1)
+
+
+class Test19ConfirmationCodes:
+    url_token = '/api/v1/auth/token/'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_code_is_single_use(self, client):
+        code = signup(client)
+        data = {'username': 'coder', 'confirmation_code': code}
+        response = client.post(self.url_token, data=data)
+        assert response.status_code == 200 and 'token' in response.json(), (
+            'Проверьте, что код из письма позволяет получить токен'
+        )
+        response = client.post(self.url_token, data=data)
+        assert response.status_code == 400, (
+            'Проверьте, что код подтверждения можно использовать один раз'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_code_bound_to_user_and_time(self, client, settings):
+        code = signup(client)
+        signup(client, 'other')
+        response = client.post(self.url_token, data={
+            'username': 'other', 'confirmation_code': code
+        })
+        assert response.status_code == 400, (
+            'Проверьте, что код подтверждения действует только для своего '
+            'пользователя'
+        )
+        user = User.objects.get(username='coder')
+        expired = confirmation_code_generator._make_code(
+            user, int(time.time()) - settings.CONFIRMATION_CODE_TIMEOUT - 1
+        )
+        response = client.post(self.url_token, data={
+            'username': 'coder', 'confirmation_code': expired
+        })
+        assert response.status_code == 400, (
+            'Проверьте, что просроченный код подтверждения не принимается'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_code_used_in_another_process(self, client):
+        from django.core.cache import cache
+
+        first = signup(client)
+        second = signup(client)
+        data = {'username': 'coder', 'confirmation_code': first}
+        assert client.post(self.url_token, data=data).status_code == 200
+        # Другой процесс или перезапуск: кэш пуст.
+        cache.clear()
+        assert client.post(self.url_token, data=data).status_code == 400, (
+            'Проверьте, что использованный код отклоняется и без кэша'
+        )
+        response = client.post(self.url_token, data={
+            'username': 'coder', 'confirmation_code': second
+        })
+        assert response.status_code == 400, (
+            'Проверьте, что вход отменяет и другие выпущенные коды'
+        )
+        assert User.objects.get(username='coder').last_login is not None
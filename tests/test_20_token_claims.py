@@ -0,0 +1,120 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from reviews.models import Category, Review, Title
+from users.authentication import token_for_user
+
+
+def claims_client(user):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token_for_user(user)}')
+    return client
+
+
+class Test20TokenClaims:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_no_user_query(self, admin):
+        client = claims_client(admin)
+        with CaptureQueriesContext(connection) as context:
+            response = client.post('/api/v1/categories/',
+                                   data={'name': 'Фильм', 'slug': 'movie'})
+        assert response.status_code == 201
+        assert not any(
+            'users_user' in query['sql'] for query in context.captured_queries
+        ), (
+            'Проверьте, что токен с claims роли не требует загрузки '
+            'пользователя из базы'
+        )
+        response = client.get('/api/v1/users/me/')
+        assert response.json()['bio'] == 'admin bio', (
+            'Проверьте, что `/users/me/` возвращает профиль из базы'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_role_change_applies_to_issued_tokens(self, admin_client,
+                                                      django_user_model):
+        demoted = django_user_model.objects.create_user(
+            username='demoted', email='demoted@yamdb.fake', role='admin'
+        )
+        client = claims_client(demoted)
+        data = {'name': 'Фильм', 'slug': 'movie'}
+        assert client.post('/api/v1/categories/', data=data).status_code \
+            == 201
+        admin_client.patch('/api/v1/users/demoted/', data={'role': 'user'})
+        response = client.post('/api/v1/categories/',
+                               data={'name': 'Книга', 'slug': 'book'})
+        assert response.status_code == 403, (
+            'Проверьте, что понижение роли действует на уже выданные токены'
+        )
+        admin_client.delete('/api/v1/users/demoted/')
+        assert client.get('/api/v1/categories/').status_code == 401, (
+            'Проверьте, что токен удалённого пользователя не принимается'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_principal_cache_for_tokens_without_claims(
+            self, moderator_client, admin_client, user):
+        category = Category.objects.create(name='Фильм', slug='movie')
+        title = Title.objects.create(name='Поворот', year=2000,
+                                     category=category)
+        review = Review.objects.create(title=title, author=user,
+                                       text='Отзыв', score=5)
+        url = f'/api/v1/titles/{title.id}/reviews/{review.id}/'
+        moderator_client.patch(url, data={'text': 'Первая правка'})
+        with CaptureQueriesContext(connection) as context:
+            response = moderator_client.patch(url, data={'text': 'Правка'})
+        assert response.status_code == 200
+        user_queries = [
+            query['sql'] for query in context.captured_queries
+            if 'FROM "users_user"' in query['sql']
+        ]
+        # автор для поля author в ответе приходит через JOIN с отзывом
+        assert not user_queries, (
+            'Проверьте, что роль пользователя берётся из кэша процесса, '
+            'а проверка автора не загружает его из базы'
+        )
+        admin_client.patch('/api/v1/users/TestModerator/',
+                           data={'role': 'user'})
+        response = moderator_client.patch(url, data={'text': 'Ещё правка'})
+        assert response.status_code == 403, (
+            'Проверьте, что изменение роли сбрасывает кэш процесса'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_role_change_from_another_process(self, django_user_model,
+                                                 settings):
+        from django.core.cache import cache
+        from users.authentication import principal_cache
+
+        demoted = django_user_model.objects.create_user(
+            username='demoted', email='demoted@yamdb.fake', role='admin'
+        )
+        token = token_for_user(demoted)
+        token['iat'] -= settings.PRINCIPAL_CACHE_TTL + 1
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        data = {'name': 'Фильм', 'slug': 'movie'}
+        assert client.post('/api/v1/categories/', data=data).status_code \
+            == 201
+
+        # Роль меняет другой процесс: сигналы и кэши этого процесса
+        # об изменении не знают.
+        django_user_model.objects.filter(pk=demoted.pk).update(role='user')
+        cache.clear()
+        principal_cache.clear()
+        response = client.post('/api/v1/categories/',
+                               data={'name': 'Книга', 'slug': 'book'})
+        assert response.status_code == 403, (
+            'Проверьте, что роль из claims старого токена сверяется '
+            'с базой, а не берётся из токена до его истечения'
+        )
+
+        django_user_model.objects.filter(pk=demoted.pk).delete()
+        cache.clear()
+        principal_cache.clear()
+        assert client.get('/api/v1/categories/').status_code == 401, (
+            'Проверьте, что токен удалённого пользователя не принимается'
+        )
@@ -0,0 +1,72 @@
+import pytest
+
+from reviews.models import Category, Comment, Review, Title
+
+
+def create_review(author):
+    category = Category.objects.create(name='Фильм', slug='movie')
+    title = Title.objects.create(name='Поворот', year=2000,
+                                 category=category)
+    review = Review.objects.create(title=title, author=author,
+                                   text='Отзыв', score=5)
+    for number in range(3):
+        Comment.objects.create(review=review, author=author,
+                               text=f'Комментарий {number}')
+    return title, review
+
+
+class Test21NestedQueries:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_list_queries(self, client, user,
+                             django_assert_max_num_queries):
+        title, review = create_review(user)
+        # родитель вместе с версией для ETag + COUNT + страница с авторами
+        with django_assert_max_num_queries(3):
+            response = client.get(f'/api/v1/titles/{title.id}/reviews/')
+        assert response.status_code == 200
+        url = f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+        with django_assert_max_num_queries(3):
+            response = client.get(url)
+        assert response.status_code == 200
+        assert len(response.json()['results']) == 3
+        # keyset-режим обходится без COUNT
+        with django_assert_max_num_queries(2):
+            response = client.get(url, {'pagination': 'cursor'})
+        assert response.status_code == 200
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_parent_loaded_once_on_create(self, user_client, admin,
+                                             django_assert_max_num_queries):
+        title, review = create_review(admin)
+        url = f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+        # пользователь токена + отзыв-родитель + вставка + версия отзыва
+        with django_assert_max_num_queries(4) as context:
+            response = user_client.post(url, data={'text': 'Новый'})
+        assert response.status_code == 201
+        parent_queries = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('SELECT')
+            and 'FROM "reviews_review"' in query['sql']
+        ]
+        assert len(parent_queries) == 1, (
+            'Проверьте, что отзыв-родитель загружается один раз за запрос'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_missing_parent(self, client, user):
+        title, review = create_review(user)
+        other = Title.objects.create(name='Другое', year=2001,
+                                     category=title.category)
+        assert client.get(
+            f'/api/v1/titles/{title.id + 100}/reviews/'
+        ).status_code == 404
+        assert client.get(
+            f'/api/v1/titles/{other.id}/reviews/{review.id}/comments/'
+        ).status_code == 404, (
+            'Проверьте, что комментарии отзыва чужого произведения '
+            'недоступны'
+        )
+        assert client.get(
+            f'/api/v1/titles/{other.id}/reviews/{review.id}/'
+        ).status_code == 404
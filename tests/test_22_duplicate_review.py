@@ -0,0 +1,89 @@
+import threading
+
+import pytest
+from django.db import IntegrityError, connection, connections
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from reviews.models import Category, Review, Title
+
+
+class Test22DuplicateReview:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_duplicate_without_precheck(self, user_client):
+        category = Category.objects.create(name='Фильм', slug='movie')
+        title = Title.objects.create(name='Поворот', year=2000,
+                                     category=category)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        data = {'text': 'Отзыв', 'score': 7}
+        assert user_client.post(url, data=data).status_code == 201
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.post(url, data=data)
+        queries = [query['sql'] for query in context.captured_queries]
+        insert = next(
+            index for index, sql in enumerate(queries)
+            if sql.startswith('INSERT INTO "reviews_review"')
+        )
+        assert not [
+            sql for sql in queries[:insert]
+            if sql.startswith('SELECT') and 'FROM "reviews_review"' in sql
+        ], 'Проверьте, что повтор ловит ограничение базы, а не запрос'
+        assert response.status_code == 400, (
+            'Проверьте, что повторный отзыв автора возвращает статус 400'
+        )
+        assert 'non_field_errors' in response.json()
+        assert Review.objects.filter(title=title).count() == 1
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_other_integrity_errors(self, user_client, monkeypatch):
+        from rest_framework.serializers import ModelSerializer
+
+        category = Category.objects.create(name='Фильм', slug='movie')
+        title = Title.objects.create(name='Поворот', year=2000,
+                                     category=category)
+
+        def create(self, validated_data):
+            raise IntegrityError('CHECK constraint failed')
+
+        monkeypatch.setattr(ModelSerializer, 'create', create)
+        with pytest.raises(IntegrityError):
+            user_client.post(f'/api/v1/titles/{title.id}/reviews/',
+                             data={'text': 'Отзыв', 'score': 7})
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_parallel_duplicates(self, token_user):
+        category = Category.objects.create(name='Фильм', slug='movie')
+        title = Title.objects.create(name='Поворот', year=2000,
+                                     category=category)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        workers = 4
+        barrier = threading.Barrier(workers)
+        statuses = []
+
+        def post():
+            try:
+                client = APIClient()
+                client.credentials(
+                    HTTP_AUTHORIZATION=f'Bearer {token_user["access"]}'
+                )
+                barrier.wait()
+                response = client.post(
+                    url, data={'text': 'Отзыв', 'score': 7}
+                )
+                statuses.append(response.status_code)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=post) for _ in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert sorted(statuses) == [201] + [400] * (workers - 1), (
+            'Проверьте, что из параллельных одинаковых отзывов сохраняется '
+            'один, а остальные получают статус 400'
+        )
+        assert Review.objects.filter(title=title).count() == 1
+        title.refresh_from_db()
+        assert title.rating_count == 1
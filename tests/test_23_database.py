@@ -0,0 +1,106 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+
+from api_yamdb.backends.pool import ConnectionPool, PoolTimeout
+from reviews.models import Category, Review
+from users.models import User
+
+
+class FakeConnection:
+    closed = 0
+
+    def close(self):
+        self.closed = 1
+
+
+class Test23Database:
+
+    @pytest.mark.django_db
+    def test_01_sqlite_pragmas(self):
+        if connection.vendor != 'sqlite':
+            pytest.skip('Только для SQLite')
+        pragmas = {}
+        with connection.cursor() as cursor:
+            for name in ('journal_mode', 'synchronous', 'busy_timeout'):
+                cursor.execute(f'PRAGMA {name}')
+                pragmas[name] = cursor.fetchone()[0]
+        assert pragmas == {
+            'journal_mode': 'wal', 'synchronous': 1, 'busy_timeout': 5000
+        }, 'Проверьте, что PRAGMA применяются при открытии соединения'
+
+    def test_02_connection_pool(self):
+        broken = set()
+
+        def check(conn):
+            if conn in broken:
+                raise ConnectionError
+
+        pool = ConnectionPool(FakeConnection, size=2, timeout=0.01,
+                              check=check)
+        first, second = pool.get(), pool.get()
+        with pytest.raises(PoolTimeout):
+            pool.get()
+        pool.put(first)
+        assert pool.get() is first, (
+            'Проверьте, что свободное соединение выдаётся повторно'
+        )
+        broken.add(first)
+        pool.put(first)
+        replacement = pool.get()
+        assert replacement is not first and first.closed, (
+            'Проверьте, что соединение, не прошедшее проверку, закрывается'
+        )
+        pool.put(second)
+        pool.put(replacement)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_benchwrites(self):
+        out = StringIO()
+        call_command('benchwrites', workers=3, titles=5, stdout=out)
+        assert '15 reviews' in out.getvalue()
+        assert 'errors: 0' in out.getvalue(), (
+            'Проверьте, что параллельные записи отзывов не падают'
+        )
+        assert not Review.objects.exists()
+        assert not Category.objects.exists()
+        assert not User.objects.exists()
+
+    def test_04_postgresql_pool_uses_backend_connect(self, monkeypatch):
+        from django.db.backends.postgresql import base
+        from psycopg2 import extensions
+
+        from api_yamdb.backends.postgresql.base import DatabaseWrapper, pools
+
+        class PGConnection(FakeConnection):
+            isolation_level = extensions.ISOLATION_LEVEL_READ_COMMITTED
+            info = type('Info', (), {
+                'transaction_status': extensions.TRANSACTION_STATUS_IDLE
+            })
+
+        opened = []
+
+        def get_new_connection(wrapper, conn_params):
+            opened.append(conn_params)
+            return PGConnection()
+
+        monkeypatch.setattr(base.DatabaseWrapper, 'get_new_connection',
+                            get_new_connection)
+        wrapper = DatabaseWrapper({
+            'NAME': 'api_yamdb', 'USER': '', 'PASSWORD': '', 'HOST': '',
+            'PORT': '', 'OPTIONS': {'pool_size': 1, 'pool_timeout': 0.01},
+        }, alias='pool_test')
+        try:
+            params = wrapper.get_connection_params()
+            first = wrapper.get_new_connection(params)
+            assert opened == [params], (
+                'Проверьте, что пул открывает соединения через '
+                'get_new_connection бэкенда Django'
+            )
+            pools['pool_test'].put(first)
+            assert wrapper.get_new_connection(params) is first
+            assert len(opened) == 1
+        finally:
+            pools.pop('pool_test', None)
@@ -0,0 +1,138 @@
+import pytest
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from api_yamdb.replicas import (PIN_COOKIE, PIN_KEY, ReplicaMiddleware,
+                                ReplicaRouter)
+from reviews.models import Title
+from users.authentication import token_for_user
+
+
+def routed_read(request, status=200, user=None):
+    """
+    Прогоняет запрос через middleware и возвращает базу для чтения
+    и ответ. user — пользователь, которого аутентифицировал бы DRF.
+    """
+    databases = []
+
+    def view(request):
+        databases.append(ReplicaRouter().db_for_read(Title))
+        if user is not None:
+            request.user = user
+        return HttpResponse(status=status)
+
+    response = ReplicaMiddleware(view)(request)
+    return databases[0], response
+
+
+def as_user(request, user):
+    request.META['HTTP_AUTHORIZATION'] = f'Bearer {token_for_user(user)}'
+    return request
+
+
+def with_pin(request, response):
+    request.COOKIES[PIN_COOKIE] = response.cookies[PIN_COOKIE].value
+    return request
+
+
+class Test24Replicas:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_reads_go_to_replicas(self, settings, user):
+        settings.DATABASE_REPLICAS = ['replica_1', 'replica_2']
+        factory = RequestFactory()
+        database, _ = routed_read(factory.get('/api/v1/titles/'))
+        assert database in ('replica_1', 'replica_2'), (
+            'Проверьте, что GET-запросы читают с реплик'
+        )
+        database, _ = routed_read(factory.post('/api/v1/titles/'),
+                                  user=user)
+        assert database == 'default', (
+            'Проверьте, что пишущие запросы читают с основной базы'
+        )
+        assert ReplicaRouter().db_for_read(Title) == 'default', (
+            'Проверьте, что вне запросов чтение идёт с основной базы'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_read_your_writes(self, settings, user, admin):
+        settings.DATABASE_REPLICAS = ['replica_1']
+        factory = RequestFactory()
+        _, response = routed_read(factory.post('/api/v1/titles/'),
+                                  status=400, user=admin)
+        assert PIN_COOKIE not in response.cookies, (
+            'Проверьте, что неуспешная запись не закрепляет пользователя '
+            'за основной базой'
+        )
+        assert routed_read(as_user(factory.get('/'), admin))[0] == (
+            'replica_1'
+        )
+
+        _, response = routed_read(factory.patch('/api/v1/users/me/'),
+                                  user=user)
+        # Другой клиент того же пользователя: cookie у него нет.
+        database, _ = routed_read(as_user(factory.get('/'), user))
+        assert database == 'default', (
+            'Проверьте, что после записи пользователь читает свои данные '
+            'с основной базы с любого клиента'
+        )
+        assert routed_read(as_user(factory.get('/'), admin))[0] == (
+            'replica_1'
+        ), 'Проверьте, что запись закрепляет только её автора'
+        assert routed_read(factory.get('/'))[0] == 'replica_1'
+
+        database, _ = routed_read(with_pin(factory.get('/'), response))
+        assert database == 'default', (
+            'Проверьте, что подписанная cookie тоже закрепляет клиент'
+        )
+        forged = factory.get('/')
+        forged.COOKIES[PIN_COOKIE] = '1'
+        assert routed_read(forged)[0] == 'replica_1', (
+            'Проверьте, что cookie без подписи не учитывается'
+        )
+
+        settings.REPLICA_PIN_SECONDS = -1
+        _, response = routed_read(factory.patch('/api/v1/users/me/'),
+                                  user=admin)
+        assert routed_read(as_user(factory.get('/'), admin))[0] == (
+            'replica_1'
+        )
+        database, _ = routed_read(with_pin(factory.get('/'), response))
+        assert database == 'replica_1', (
+            'Проверьте, что закрепление истекает через REPLICA_PIN_SECONDS'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_pin_uses_drf_user(self, settings, user, user_client):
+        from django.core.cache import cache
+
+        settings.DATABASE_REPLICAS = ['replica_1']
+        response = user_client.patch('/api/v1/users/me/',
+                                     data={'bio': 'Новое о себе'})
+        assert response.status_code == 200
+        assert cache.get(PIN_KEY.format(user_id=user.pk)), (
+            'Проверьте, что пользователь, аутентифицированный DRF, '
+            'закрепляется за основной базой после записи'
+        )
+        assert PIN_COOKIE in response.cookies
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_one_replica_per_request(self, settings):
+        settings.DATABASE_REPLICAS = ['replica_1', 'replica_2']
+        requests = []
+
+        def view(request):
+            requests.append({
+                ReplicaRouter().db_for_read(Title) for _ in range(10)
+            })
+            return HttpResponse()
+
+        middleware = ReplicaMiddleware(view)
+        for _ in range(20):
+            middleware(RequestFactory().get('/api/v1/titles/'))
+        assert all(len(databases) == 1 for databases in requests), (
+            'Проверьте, что все чтения одного запроса идут на одну реплику'
+        )
+        assert set.union(*requests) == {'replica_1', 'replica_2'}, (
+            'Проверьте, что запросы распределяются между репликами'
+        )
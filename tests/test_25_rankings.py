@@ -0,0 +1,145 @@
+import csv
+import shutil
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from reviews.models import (Category, Genre, RankingState, Review, Title,
+                            TitleRanking)
+from reviews.rankings import refresh_rankings
+from users.models import User
+
+
+def create_catalogue():
+    category = Category.objects.create(name='Фильм', slug='movie')
+    drama = Genre.objects.create(name='Драма', slug='drama')
+    User.objects.bulk_create(
+        User(username=f'critic_{number}', email=f'critic_{number}@yamdb.fake')
+        for number in range(20)
+    )
+    authors = list(User.objects.filter(username__startswith='critic_'))
+    titles = {}
+    for name, scores in (('Шедевр', [9] * 20), ('Новинка', [10]),
+                         ('Середняк', [5] * 10)):
+        title = Title.objects.create(name=name, year=2000, category=category)
+        title.genre.add(drama)
+        for author, score in zip(authors, scores):
+            Review.objects.create(title=title, author=author,
+                                  text='Отзыв', score=score)
+        titles[name] = title
+    return titles, authors
+
+
+def names(response):
+    return [row['title']['name'] for row in response.json()['results']]
+
+
+class Test25Rankings:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_bayesian_top(self, client, django_assert_max_num_queries):
+        create_catalogue()
+        refresh_rankings()
+        # страница с произведениями и категориями + жанры
+        with django_assert_max_num_queries(2):
+            response = client.get('/api/v1/rankings/top/')
+        assert response.status_code == 200
+        assert names(response) == ['Шедевр', 'Новинка', 'Середняк'], (
+            'Проверьте, что одна оценка 10 весит меньше двадцати оценок 9'
+        )
+        response = client.get('/api/v1/rankings/top/',
+                              {'min_reviews': 5, 'genre': 'drama'})
+        assert names(response) == ['Шедевр', 'Середняк']
+        response = client.get('/api/v1/rankings/reviewed/',
+                              {'category': 'movie', 'limit': 1})
+        assert names(response) == ['Шедевр']
+        pages = [names(response)]
+        while response.json()['next']:
+            assert 'offset' not in response.json()['next']
+            response = client.get(response.json()['next'])
+            pages.append(names(response))
+        assert pages == [['Шедевр'], ['Середняк'], ['Новинка']], (
+            'Проверьте, что страницы рейтинга идут по курсору '
+            'без пропусков и повторов'
+        )
+        response = client.get(response.json()['previous'])
+        assert names(response) == ['Середняк']
+        assert client.get(
+            '/api/v1/rankings/top/', {'genre': 'unknown'}
+        ).status_code == 404
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_incremental_refresh(self, client, settings):
+        settings.RANKING_PRIOR_TOLERANCE = 10
+        titles, authors = create_catalogue()
+        assert refresh_rankings()[2], 'Первый пересчёт должен быть полным'
+        past = timezone.now() - timedelta(days=1)
+        Title.objects.update(modified=past)
+        RankingState.objects.update(refreshed_at=past + timedelta(hours=1))
+        Review.objects.create(title=titles['Середняк'], author=authors[15],
+                              text='Отзыв', score=5)
+        refreshed, _, full = refresh_rankings()
+        assert (refreshed, full) == (1, False), (
+            'Проверьте, что пересчитываются только изменившиеся произведения'
+        )
+        assert TitleRanking.objects.get(
+            title=titles['Середняк'], scope=TitleRanking.GLOBAL_SCOPE
+        ).review_count == 11
+        response = client.get('/api/v1/rankings/reviewed/')
+        assert response.json()['results'][1]['review_count'] == 11, (
+            'Проверьте, что пересчёт сбрасывает кэш рейтингов'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_trending(self, client):
+        titles, _ = create_catalogue()
+        Review.objects.filter(title=titles['Шедевр']).update(
+            pub_date=timezone.now() - timedelta(days=60)
+        )
+        refresh_rankings()
+        response = client.get('/api/v1/rankings/trending/')
+        assert names(response) == ['Середняк', 'Новинка'], (
+            'Проверьте, что активность учитывает только недавние отзывы '
+            'и растёт с их числом'
+        )
+        assert response.json()['results'][0]['trending'] == pytest.approx(
+            10, abs=0.1
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_imported_changes(self, settings, tmp_path):
+        settings.RANKING_PRIOR_TOLERANCE = 10
+        data = tmp_path / 'data'
+        shutil.copytree(f'{settings.BASE_DIR}/static/data', data)
+        call_command('loaddb', '--workers', '1', '--path', str(data))
+        refresh_rankings()
+        past = timezone.now() - timedelta(days=1)
+        Title.objects.update(modified=past)
+        RankingState.objects.update(refreshed_at=past + timedelta(hours=1))
+
+        reviewed = Review.objects.get(pk=1)
+        title = Title.objects.exclude(pk=reviewed.title_id).exclude(
+            reviews__author_id=100).order_by('pk').first()
+        with open(data / 'review.csv', encoding='utf-8', newline='') as file:
+            rows = list(csv.reader(file))
+        for row in rows:
+            if row[0] == '1':
+                row[4] = '1' if row[4] != '1' else '2'
+        rows.append(['1000', str(title.pk), 'Новый отзыв', '100', '10',
+                     '2021-01-01T00:00:00Z'])
+        with open(data / 'review.csv', 'w', encoding='utf-8',
+                  newline='') as file:
+            csv.writer(file).writerows(rows)
+        call_command('loaddb', '--upsert', '--path', str(data))
+
+        refreshed, _, full = refresh_rankings()
+        assert (refreshed, full) == (2, False), (
+            'Проверьте, что инкрементальный пересчёт видит отзывы, '
+            'добавленные и изменённые командой loaddb'
+        )
+        ranking = TitleRanking.objects.get(
+            title=title, scope=TitleRanking.GLOBAL_SCOPE)
+        assert ranking.review_count == Review.objects.filter(
+            title=title).count()
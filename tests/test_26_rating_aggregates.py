@@ -0,0 +1,93 @@
+import pytest
+from django.core.management import CommandError, call_command
+
+from .common import create_reviews
+
+
+def stored_rating(title_id):
+    from reviews.models import ScoreHistogram, Title
+
+    title = Title.objects.get(pk=title_id)
+    histogram = ScoreHistogram.objects.filter(title_id=title_id).first()
+    counts = histogram.counts() if histogram else {}
+    return title.rating_sum, title.rating_count, {
+        score: count for score, count in counts.items() if count
+    }
+
+
+class Test26RatingAggregates:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_review_changes(self, admin_client, admin):
+        from reviews.models import Review
+
+        reviews, titles, _, _ = create_reviews(admin_client, admin)
+        first, second = titles[0]['id'], titles[1]['id']
+        assert stored_rating(first) == (12, 3, {3: 1, 4: 1, 5: 1}), (
+            'Проверьте, что создание отзыва добавляет оценку '
+            'в сумму, количество и распределение оценок произведения'
+        )
+
+        url = f'/api/v1/titles/{first}/reviews/{reviews[0]["id"]}/'
+        response = admin_client.patch(url, data={'score': 10})
+        assert response.status_code == 200
+        assert stored_rating(first) == (17, 3, {3: 1, 4: 1, 10: 1}), (
+            'Проверьте, что изменение оценки отзыва сдвигает агрегаты '
+            'на разницу оценок'
+        )
+
+        response = admin_client.delete(url)
+        assert response.status_code == 204
+        assert stored_rating(first) == (7, 2, {3: 1, 4: 1}), (
+            'Проверьте, что удаление отзыва убирает его оценку из агрегатов'
+        )
+
+        review = Review.objects.get(pk=reviews[1]['id'])
+        review.title_id = second
+        review.save()
+        assert stored_rating(first) == (4, 1, {4: 1})
+        assert stored_rating(second) == (3, 1, {3: 1}), (
+            'Проверьте, что перенос отзыва к другому произведению '
+            'переносит его оценку'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_save_with_deferred_fields(self, admin_client, admin):
+        from reviews.models import Review
+
+        reviews, titles, _, _ = create_reviews(admin_client, admin)
+        first = titles[0]['id']
+        review = Review.objects.only('id', 'text').get(pk=reviews[0]['id'])
+        review.text = 'Правка без оценки'
+        review.save()
+        assert stored_rating(first) == (12, 3, {3: 1, 4: 1, 5: 1}), (
+            'Проверьте, что сохранение отзыва, загруженного без оценки '
+            'и произведения, не считает его новым'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_rebuild_ratings(self, admin_client, admin, capsys):
+        from reviews.models import ScoreHistogram, Title
+
+        _, titles, _, _ = create_reviews(admin_client, admin)
+        title_id = titles[0]['id']
+        call_command('rebuildratings', '--check')
+        assert 'drifted titles: 0' in capsys.readouterr().out, (
+            'Проверьте, что `rebuildratings --check` не находит расхождений '
+            'в агрегатах, которые поддерживают сигналы'
+        )
+
+        Title.objects.filter(pk=title_id).update(rating_sum=0)
+        ScoreHistogram.objects.filter(title_id=title_id).update(score_5=0)
+        with pytest.raises(CommandError):
+            call_command('rebuildratings', '--check')
+        assert Title.objects.get(pk=title_id).rating_sum == 0, (
+            'Проверьте, что `rebuildratings --check` не исправляет агрегаты'
+        )
+
+        call_command('rebuildratings')
+        assert stored_rating(title_id) == (12, 3, {3: 1, 4: 1, 5: 1}), (
+            'Проверьте, что `rebuildratings` пересчитывает агрегаты '
+            'по отзывам'
+        )
+        call_command('rebuildratings', '--check')
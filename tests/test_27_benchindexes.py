@@ -0,0 +1,56 @@
+import pytest
+from django.core.management import CommandError, call_command
+
+
+class Test27BenchIndexes:
+    options = ('--titles', '4', '--reviews', '8', '--comments', '3',
+               '--repeat', '1')
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_seed_requires_database(self):
+        from reviews.models import Title
+
+        with pytest.raises(CommandError):
+            call_command('benchindexes', '--seed', *self.options)
+        assert not Title.objects.exists(), (
+            'Проверьте, что `benchindexes --seed` без `--database` '
+            'ничего не пишет в базу'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_seed_and_explain(self, capsys, tmp_path):
+        import sqlite3
+
+        from reviews.models import Review, Title
+
+        path = str(tmp_path / 'bench.sqlite3')
+        call_command('benchindexes', '--seed', '--sqlite-path', path,
+                     *self.options)
+        output = capsys.readouterr().out
+        assert 'GET /titles/{id}/reviews/' in output and 'avg' in output, (
+            'Проверьте, что `benchindexes` выводит планы и время запросов'
+        )
+        assert not Title.objects.exists() and not Review.objects.exists(), (
+            'Проверьте, что `--sqlite-path` не пишет в основную базу'
+        )
+
+        def counts():
+            with sqlite3.connect(path) as bench:
+                return [bench.execute(
+                    f'SELECT COUNT(*) FROM reviews_{table}'
+                ).fetchone()[0] for table in ('title', 'review', 'comment')]
+
+        assert counts() == [4, 8, 3]
+        with sqlite3.connect(path) as bench:
+            assert bench.execute(
+                'SELECT COUNT(*) FROM reviews_title WHERE rating_count = 2'
+            ).fetchone()[0] == 4, (
+                'Проверьте, что после посева пересчитываются рейтинги'
+            )
+
+        call_command('benchindexes', '--seed', '--sqlite-path', path,
+                     *self.options)
+        assert 'already seeded' in capsys.readouterr().out
+        assert counts() == [4, 8, 3], (
+            'Проверьте, что повторный посев не дублирует данные'
+        )
@@ -0,0 +1,147 @@
+import csv
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import pytest
+from django.core.management import call_command
+
+
+def loaddb(capsys, *args):
+    call_command('loaddb', *args)
+    return capsys.readouterr().out
+
+
+def edit_csv(path, row_id, **changes):
+    with open(path, encoding='utf-8', newline='') as file:
+        rows = list(csv.reader(file))
+    header = rows[0]
+    for row in rows[1:]:
+        if row[0] == str(row_id):
+            for name, value in changes.items():
+                row[header.index(name)] = value
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        csv.writer(file).writerows(rows)
+
+
+class Test28LoadDB:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_load_and_reload(self, capsys):
+        from reviews.models import Comment, Review, Title
+
+        output = loaddb(capsys, '--workers', '1')
+        assert 'review.csv: 72 inserted, 0 already present' in output
+        assert Review.objects.count() == 72 and Title.objects.count() == 32
+        assert Review.objects.get(pk=1).pub_date == datetime(
+            2019, 9, 24, 21, 8, 21, 567000, tzinfo=timezone.utc
+        ), 'Проверьте, что `loaddb` сохраняет дату публикации из CSV'
+        assert Comment.objects.get(pk=1).pub_date.year == 2020
+
+        output = loaddb(capsys, '--workers', '1')
+        assert 'review.csv: 0 inserted, 72 already present' in output, (
+            'Проверьте, что повторная загрузка сообщает, что строки '
+            'уже есть, а не что они загружены'
+        )
+        assert Review.objects.count() == 72
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_parallel_workers(self, capsys):
+        from django.conf import settings
+        from reviews.management.commands.loaddb import iter_parsed
+        from reviews.models import Genre_title, Review
+
+        output = loaddb(capsys, '--workers', '2', '--batch-size', '10')
+        assert 'review.csv: 72 inserted' in output, (
+            'Проверьте, что `loaddb --workers 2` загружает все строки'
+        )
+        assert Review.objects.count() == 72
+        assert Genre_title.objects.count() == 42
+        assert Review.objects.get(pk=1).pub_date.year == 2019
+
+        class CountingPool(ThreadPoolExecutor):
+            submitted = 0
+
+            def submit(self, *args, **kwargs):
+                self.submitted += 1
+                return super().submit(*args, **kwargs)
+
+        path = f'{settings.BASE_DIR}/static/data/review.csv'
+        with CountingPool(max_workers=2) as pool:
+            consumed = 0
+            for rows, _ in iter_parsed('review.csv', path, 10, pool,
+                                       window=3):
+                consumed += 1
+                assert pool.submitted - consumed < 3, (
+                    'Проверьте, что в пуле одновременно не больше window '
+                    'пачек, а не весь файл'
+                )
+        assert consumed == 8
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_upsert(self, capsys, tmp_path, monkeypatch):
+        from api.v1.cache import generation
+        from django.conf import settings
+        from django.core.cache import cache
+        from reviews.management.commands import loaddb as command
+        from reviews.models import Review, Title
+        from users.authentication import PRINCIPAL_KEY
+
+        rebuilt = []
+
+        def rebuild_ratings(title_ids=None):
+            rebuilt.append(title_ids)
+            return command.rebuild_ratings.__wrapped__(title_ids=title_ids)
+
+        rebuild_ratings.__wrapped__ = command.rebuild_ratings
+        monkeypatch.setattr(command, 'rebuild_ratings', rebuild_ratings)
+
+        data = tmp_path / 'data'
+        shutil.copytree(f'{settings.BASE_DIR}/static/data', data)
+        loaddb(capsys, '--workers', '1', '--path', str(data))
+        assert len(rebuilt.pop()) == 32
+        output = loaddb(capsys, '--upsert', '--path', str(data))
+        assert 'review.csv: 0 inserted, 0 updated, 72 skipped' in output, (
+            'Проверьте, что `--upsert` после обычной загрузки не '
+            'перезаписывает совпадающие строки'
+        )
+        assert not rebuilt, (
+            'Проверьте, что без записанных отзывов `loaddb` не пересчитывает '
+            'агрегаты всех произведений'
+        )
+
+        review = Review.objects.get(pk=1)
+        title = Title.objects.get(pk=review.title_id)
+        titles_generation = generation('titles')
+        score = 1 if review.score != 1 else 2
+        edit_csv(data / 'review.csv', 1, score=str(score))
+        edit_csv(data / 'users.csv', 101, role='user')
+        output = loaddb(capsys, '--upsert', '--path', str(data))
+        assert 'review.csv: 0 inserted, 1 updated, 71 skipped' in output
+        assert 'users.csv: 0 inserted, 1 updated, 4 skipped' in output
+        assert rebuilt.pop() == {title.pk}, (
+            'Проверьте, что `loaddb` пересчитывает агрегаты только '
+            'произведений с изменёнными отзывами'
+        )
+
+        changed = Title.objects.get(pk=title.pk)
+        assert changed.rating_sum == title.rating_sum - review.score + score
+        assert changed.version > title.version, (
+            'Проверьте, что `--upsert` увеличивает версию произведения, '
+            'отзывы которого изменились'
+        )
+        assert changed.modified > title.modified
+        assert Review.objects.get(pk=1).pub_date == review.pub_date
+        assert Review.objects.get(pk=1).version > review.version
+        assert generation('titles') != titles_generation, (
+            'Проверьте, что `--upsert` сбрасывает кэш ответов API'
+        )
+        assert cache.get(PRINCIPAL_KEY.format(user_id=101))['role'] == (
+            'user'
+        ), 'Проверьте, что `--upsert` обновляет роли в кэше аутентификации'
+
+        output = loaddb(capsys, '--upsert', '--path', str(data))
+        assert 'review.csv: 0 inserted, 0 updated, 72 skipped' in output
+        assert Title.objects.get(pk=title.pk).version == changed.version, (
+            'Проверьте, что повторный `--upsert` ничего не меняет'
+        )